@@ -0,0 +1,116 @@
+"""Initial schema (the tables create_all built before migrations)
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-14
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+revision = "0001"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+platform_enum = sa.Enum("TIKTOK", "INSTAGRAM", "YOUTUBE", name="platformenum")
+job_status_enum = sa.Enum("PENDING", "RUNNING", "COMPLETED", "FAILED", name="jobstatusenum")
+
+# Reuses the type created with the keywords table
+platform_enum_ref = postgresql.ENUM(
+    "TIKTOK", "INSTAGRAM", "YOUTUBE", name="platformenum", create_type=False
+)
+
+
+def upgrade() -> None:
+    op.create_table(
+        "users",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("email", sa.String(255), nullable=False),
+        sa.Column("hashed_password", sa.String(255), nullable=False),
+        sa.Column("company_name", sa.String(255), nullable=True),
+        sa.Column("is_active", sa.Boolean(), nullable=True),
+        sa.Column("is_admin", sa.Boolean(), nullable=True),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+        sa.Column("updated_at", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("google_sheet_id", sa.String(255), nullable=True),
+    )
+    op.create_index("ix_users_id", "users", ["id"])
+    op.create_index("ix_users_email", "users", ["email"], unique=True)
+
+    op.create_table(
+        "keywords",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("user_id", sa.Integer(), sa.ForeignKey("users.id"), nullable=False),
+        sa.Column("keyword", sa.String(255), nullable=False),
+        sa.Column("platform", platform_enum, nullable=False),
+        sa.Column("is_active", sa.Boolean(), nullable=True),
+        sa.Column("results_per_run", sa.Integer(), nullable=True),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+    )
+    op.create_index("ix_keywords_id", "keywords", ["id"])
+
+    op.create_table(
+        "videos",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("user_id", sa.Integer(), sa.ForeignKey("users.id"), nullable=False),
+        sa.Column("keyword_id", sa.Integer(), sa.ForeignKey("keywords.id"), nullable=False),
+        sa.Column("platform", platform_enum_ref, nullable=False),
+        sa.Column("video_url", sa.String(500), nullable=False, unique=True),
+        sa.Column("video_id", sa.String(255), nullable=True),
+        sa.Column("author_username", sa.String(255), nullable=True),
+        sa.Column("author_name", sa.String(255), nullable=True),
+        sa.Column("description", sa.Text(), nullable=True),
+        sa.Column("likes", sa.Integer(), nullable=True),
+        sa.Column("comments", sa.Integer(), nullable=True),
+        sa.Column("shares", sa.Integer(), nullable=True),
+        sa.Column("views", sa.Integer(), nullable=True),
+        sa.Column("transcription", sa.Text(), nullable=True),
+        sa.Column("transcription_status", sa.String(50), nullable=True),
+        sa.Column("posted_at", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("scraped_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+    )
+    op.create_index("ix_videos_id", "videos", ["id"])
+
+    op.create_table(
+        "scrape_jobs",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("user_id", sa.Integer(), sa.ForeignKey("users.id"), nullable=False),
+        sa.Column("status", job_status_enum, nullable=True),
+        sa.Column("platform", platform_enum_ref, nullable=True),
+        sa.Column("keywords_processed", sa.Integer(), nullable=True),
+        sa.Column("videos_found", sa.Integer(), nullable=True),
+        sa.Column("videos_transcribed", sa.Integer(), nullable=True),
+        sa.Column("error_message", sa.Text(), nullable=True),
+        sa.Column("started_at", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("completed_at", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+    )
+    op.create_index("ix_scrape_jobs_id", "scrape_jobs", ["id"])
+
+    op.create_table(
+        "user_settings",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("user_id", sa.Integer(), sa.ForeignKey("users.id"), nullable=False, unique=True),
+        sa.Column("auto_scrape_enabled", sa.Boolean(), nullable=True),
+        sa.Column("scrape_frequency", sa.String(50), nullable=True),
+        sa.Column("scrape_time", sa.String(10), nullable=True),
+        sa.Column("min_likes", sa.Integer(), nullable=True),
+        sa.Column("min_views", sa.Integer(), nullable=True),
+        sa.Column("date_filter", sa.String(50), nullable=True),
+        sa.Column("email_notifications", sa.Boolean(), nullable=True),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+        sa.Column("updated_at", sa.DateTime(timezone=True), nullable=True),
+    )
+    op.create_index("ix_user_settings_id", "user_settings", ["id"])
+
+
+def downgrade() -> None:
+    op.drop_table("user_settings")
+    op.drop_table("scrape_jobs")
+    op.drop_table("videos")
+    op.drop_table("keywords")
+    op.drop_table("users")
+    job_status_enum.drop(op.get_bind(), checkfirst=True)
+    platform_enum.drop(op.get_bind(), checkfirst=True)
@@ -0,0 +1,27 @@
+"""Composite indexes for per-user dashboard and job queries
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-14
+"""
+from alembic import op
+
+
+revision = "0002"
+down_revision = "0001"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index("ix_keywords_user_active", "keywords", ["user_id", "is_active"])
+    op.create_index("ix_videos_user_status", "videos", ["user_id", "transcription_status"])
+    op.create_index("ix_videos_user_scraped", "videos", ["user_id", "scraped_at"])
+    op.create_index("ix_jobs_user_created", "scrape_jobs", ["user_id", "created_at"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_jobs_user_created", table_name="scrape_jobs")
+    op.drop_index("ix_videos_user_scraped", table_name="videos")
+    op.drop_index("ix_videos_user_status", table_name="videos")
+    op.drop_index("ix_keywords_user_active", table_name="keywords")
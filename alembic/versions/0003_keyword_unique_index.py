@@ -0,0 +1,52 @@
+"""Unique (user_id, keyword, platform) on keywords
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-14
+"""
+from alembic import op
+
+
+revision = "0003"
+down_revision = "0002"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Remove duplicates left by the old check-then-insert path, keeping the
+    # oldest and moving their videos onto it
+    op.execute(
+        """
+        UPDATE videos v
+        SET keyword_id = keep.id
+        FROM keywords k
+        JOIN (
+            SELECT user_id, keyword, platform, MIN(id) AS id
+            FROM keywords
+            GROUP BY user_id, keyword, platform
+        ) keep USING (user_id, keyword, platform)
+        WHERE v.keyword_id = k.id
+          AND k.id <> keep.id
+        """
+    )
+    op.execute(
+        """
+        DELETE FROM keywords k
+        USING keywords older
+        WHERE k.user_id = older.user_id
+          AND k.keyword = older.keyword
+          AND k.platform = older.platform
+          AND k.id > older.id
+        """
+    )
+    op.create_index(
+        "uq_keywords_user_keyword_platform",
+        "keywords",
+        ["user_id", "keyword", "platform"],
+        unique=True,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("uq_keywords_user_keyword_platform", table_name="keywords")
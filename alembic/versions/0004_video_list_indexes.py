@@ -0,0 +1,54 @@
+"""Compound indexes for the video and keyword list endpoints
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-14
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0004"
+down_revision = "0003"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        "ix_videos_user_scraped_likes",
+        "videos",
+        ["user_id", sa.text("scraped_at DESC"), sa.text("likes DESC")],
+    )
+    op.create_index(
+        "ix_videos_user_platform_scraped",
+        "videos",
+        ["user_id", "platform", sa.text("scraped_at DESC")],
+    )
+    op.create_index(
+        "ix_videos_user_keyword_likes",
+        "videos",
+        ["user_id", "keyword_id", sa.text("likes DESC")],
+    )
+    op.create_index(
+        "ix_videos_user_pending_scraped",
+        "videos",
+        ["user_id", sa.text("scraped_at DESC")],
+        postgresql_where=sa.text("transcription_status = 'pending'"),
+    )
+    op.create_index(
+        "ix_keywords_user_platform_active",
+        "keywords",
+        ["user_id", "platform", "is_active"],
+    )
+    # Covered by the leading columns of ix_videos_user_scraped_likes
+    op.drop_index("ix_videos_user_scraped", table_name="videos")
+
+
+def downgrade() -> None:
+    op.create_index("ix_videos_user_scraped", "videos", ["user_id", "scraped_at"])
+    op.drop_index("ix_keywords_user_platform_active", table_name="keywords")
+    op.drop_index("ix_videos_user_pending_scraped", table_name="videos")
+    op.drop_index("ix_videos_user_keyword_likes", table_name="videos")
+    op.drop_index("ix_videos_user_platform_scraped", table_name="videos")
+    op.drop_index("ix_videos_user_scraped_likes", table_name="videos")
@@ -0,0 +1,36 @@
+"""Trigram indexes for video search
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-14
+"""
+from alembic import op
+
+
+revision = "0005"
+down_revision = "0004"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    op.create_index(
+        "ix_videos_description_trgm",
+        "videos",
+        ["description"],
+        postgresql_using="gin",
+        postgresql_ops={"description": "gin_trgm_ops"},
+    )
+    op.create_index(
+        "ix_videos_transcription_trgm",
+        "videos",
+        ["transcription"],
+        postgresql_using="gin",
+        postgresql_ops={"transcription": "gin_trgm_ops"},
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_videos_transcription_trgm", table_name="videos")
+    op.drop_index("ix_videos_description_trgm", table_name="videos")
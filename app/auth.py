@@ -1,17 +1,27 @@
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 from typing import Optional
-from jose import JWTError, jwt
+import jwt
 from passlib.context import CryptContext
 from fastapi import Depends, HTTPException, status
+from fastapi.concurrency import run_in_threadpool
 from fastapi.security import OAuth2PasswordBearer
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.cache import cache_user, get_cached_user
 from app.config import settings
 from app.database import get_db
 from app.models import User
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# argon2 for new hashes; bcrypt kept so existing hashes verify and get upgraded on login
+pwd_context = CryptContext(schemes=["argon2", "bcrypt"], deprecated="auto")
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/auth/login")
 
+# Encoded once at import instead of per token
+SIGNING_KEY = settings.secret_key.encode()
+
+# Verified against when the email is unknown so every login costs one hash check
+DUMMY_HASH = pwd_context.hash("dummy-password-for-timing")
+
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """Verify a password against its hash"""
@@ -23,32 +33,60 @@ def get_password_hash(password: str) -> str:
     return pwd_context.hash(password)
 
 
+async def authenticate_user(db: AsyncSession, email: str, password: str) -> Optional[User]:
+    """Return the user if the credentials are valid, rehashing legacy hashes"""
+    result = await db.execute(select(User).where(User.email == email))
+    user = result.scalar_one_or_none()
+    if user is None:
+        # Same work as a real check so response time doesn't reveal registered emails
+        await run_in_threadpool(pwd_context.verify, password, DUMMY_HASH)
+        return None
+    
+    # Hash verification is CPU-bound; keep it off the event loop
+    valid, new_hash = await run_in_threadpool(
+        pwd_context.verify_and_update, password, user.hashed_password
+    )
+    if not valid:
+        return None
+    
+    if new_hash:
+        user.hashed_password = new_hash
+        await db.commit()
+    
+    return user
+
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     """Create JWT access token"""
     to_encode = data.copy()
     if expires_delta:
-        expire = datetime.utcnow() + expires_delta
+        expire = datetime.now(timezone.utc) + expires_delta
     else:
-        expire = datetime.utcnow() + timedelta(minutes=settings.access_token_expire_minutes)
+        expire = datetime.now(timezone.utc) + timedelta(minutes=settings.access_token_expire_minutes)
     to_encode.update({"exp": expire})
-    encoded_jwt = jwt.encode(to_encode, settings.secret_key, algorithm=settings.algorithm)
+    encoded_jwt = jwt.encode(to_encode, SIGNING_KEY, algorithm=settings.algorithm)
     return encoded_jwt
 
 
 def decode_token(token: str) -> Optional[dict]:
     """Decode and validate JWT token"""
     try:
-        payload = jwt.decode(token, settings.secret_key, algorithms=[settings.algorithm])
+        payload = jwt.decode(token, SIGNING_KEY, algorithms=[settings.algorithm])
         return payload
-    except JWTError:
+    except jwt.InvalidTokenError:
         return None
 
 
 async def get_current_user(
     token: str = Depends(oauth2_scheme),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ) -> User:
-    """Get current authenticated user from JWT token"""
+    """
+    Get current authenticated user from JWT token
+    
+    May return a detached snapshot from the user cache; endpoints that
+    modify the user must load it through their own session first.
+    """
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
@@ -59,13 +97,22 @@ async def get_current_user(
     if payload is None:
         raise credentials_exception
     
-    user_id: int = payload.get("sub")
-    if user_id is None:
+    # "sub" is a string claim; user ids are stored as their decimal form
+    try:
+        user_id = int(payload.get("sub"))
+    except (TypeError, ValueError):
         raise credentials_exception
     
-    user = db.query(User).filter(User.id == user_id).first()
-    if user is None:
-        raise credentials_exception
+    # Cached snapshot first; fall back to the database and backfill
+    cached = await get_cached_user(user_id)
+    if cached is not None:
+        user = User(**cached)
+    else:
+        result = await db.execute(select(User).where(User.id == user_id))
+        user = result.scalar_one_or_none()
+        if user is None:
+            raise credentials_exception
+        await cache_user(user)
     
     if not user.is_active:
         raise HTTPException(
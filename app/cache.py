@@ -0,0 +1,241 @@
+from fastapi import Request, Response
+from fastapi_cache import FastAPICache
+from fastapi_cache.coder import Coder
+from pydantic import BaseModel
+from redis import asyncio as aioredis
+from sqlalchemy.engine import Row, RowMapping
+from typing import Dict, Optional
+from datetime import datetime
+from functools import wraps
+import redis
+import hashlib
+import json
+import logging
+import orjson
+import time
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Prefix for every response cache key (set in FastAPICache.init)
+CACHE_PREFIX = "vct"
+
+# Shared async client; connections are opened lazily on first command
+redis_client = aioredis.from_url(settings.redis_url)
+
+# User columns cached for get_current_user (never the password hash)
+USER_CACHE_FIELDS = (
+    "id", "email", "company_name", "is_active", "is_admin", "google_sheet_id", "created_at"
+)
+
+# Namespace for cached dashboard responses
+DASHBOARD_NAMESPACE = "dash"
+
+# Namespace for cached video list/stats responses
+VIDEOS_NAMESPACE = "videos"
+
+
+def _user_namespace(user_id: int) -> str:
+    return f"user={user_id}"
+
+
+def no_db_key_builder(
+    func,
+    namespace: str = "",
+    *,
+    request=None,
+    response=None,
+    args=(),
+    kwargs=None
+) -> str:
+    """
+    Key cached responses by user and query parameters
+    
+    The db session and user object differ on every request, so they are
+    left out of the key; the user id leads it so one clear drops all of a
+    user's entries ("<prefix>:user=<id>:<namespace>:<func>:<params>").
+    """
+    params = dict(kwargs)
+    params.pop("db", None)
+    current_user = params.pop("current_user")
+    return (
+        f"{FastAPICache.get_prefix()}:{_user_namespace(current_user.id)}:"
+        f"{namespace}:{func.__name__}:{sorted(params.items())}"
+    )
+
+
+class ORJSONCoder(Coder):
+    """Cache coder that also handles SQLAlchemy result rows and schemas"""
+    
+    @staticmethod
+    def _default(obj):
+        if isinstance(obj, BaseModel):
+            return obj.model_dump()
+        if isinstance(obj, Row):
+            return obj._asdict()
+        if isinstance(obj, RowMapping):
+            return dict(obj)
+        raise TypeError
+    
+    @classmethod
+    def encode(cls, value) -> bytes:
+        return orjson.dumps(value, default=cls._default)
+    
+    @classmethod
+    def decode(cls, value):
+        return orjson.loads(value)
+
+
+def _version_key(user_id: int) -> str:
+    return f"{CACHE_PREFIX}:version:{user_id}"
+
+
+def _user_responses_pattern(user_id: int) -> str:
+    return f"{CACHE_PREFIX}:{_user_namespace(user_id)}:*"
+
+
+# Keys fetched per SCAN step; SCAN doesn't block Redis (also the Celery broker) like KEYS
+SCAN_COUNT = 500
+
+
+async def invalidate_user_responses(user_id: int) -> None:
+    """Drop every cached response for a user after their data changes"""
+    try:
+        keys = [
+            key async for key in redis_client.scan_iter(
+                match=_user_responses_pattern(user_id), count=SCAN_COUNT
+            )
+        ]
+        if keys:
+            await redis_client.delete(*keys)
+        await redis_client.incr(_version_key(user_id))  # Retires issued ETags
+    except Exception as e:
+        # Stale entries expire on their own; never fail a write over the cache
+        logger.warning(f"Failed to invalidate response cache for user {user_id}: {str(e)}")
+
+
+def invalidate_user_responses_sync(user_id: int) -> None:
+    """Drop every cached response for a user from a sync worker process"""
+    try:
+        client = redis.Redis.from_url(settings.redis_url)
+        keys = list(client.scan_iter(match=_user_responses_pattern(user_id), count=SCAN_COUNT))
+        if keys:
+            client.delete(*keys)
+        client.incr(_version_key(user_id))
+    except Exception as e:
+        logger.warning(f"Failed to invalidate response cache for user {user_id}: {str(e)}")
+
+
+# Lets browsers reuse a response briefly; "private" keeps shared caches out
+CONDITIONAL_CACHE_CONTROL = "private, max-age=15"
+
+# ETags also roll over on this period (the @cache expire of the endpoints
+# using conditional_get), since their "last N days" windows move without writes
+ETAG_TIME_BUCKET_SECONDS = 30
+
+
+async def _response_etag(user_id: int, request: Request) -> Optional[str]:
+    """ETag for a user's response to this URL; changes on every invalidation and time bucket"""
+    try:
+        version = await redis_client.get(_version_key(user_id))
+    except Exception as e:
+        logger.warning(f"Response version read failed for user {user_id}: {str(e)}")
+        return None
+    
+    bucket = int(time.time()) // ETAG_TIME_BUCKET_SECONDS
+    digest = hashlib.sha256(
+        f"{user_id}:{int(version or 0)}:{bucket}:{request.url.path}?{request.url.query}".encode()
+    ).hexdigest()
+    return f'"{digest}"'
+
+
+def conditional_get(func):
+    """
+    Answer If-None-Match with 304 until the user's data changes
+    
+    Goes above @cache so our ETag and Cache-Control replace the ones
+    fastapi-cache writes (its ETags hash per process, so they don't match
+    across workers).
+    """
+    @wraps(func)
+    async def inner(*args, **kwargs):
+        request = kwargs["request"]
+        response = kwargs["response"]
+        etag = await _response_etag(kwargs["current_user"].id, request)
+        
+        if etag is None:
+            return await func(*args, **kwargs)
+        
+        headers = {"ETag": etag, "Cache-Control": CONDITIONAL_CACHE_CONTROL}
+        if request.headers.get("if-none-match") == etag:
+            return Response(status_code=304, headers=headers)
+        
+        result = await func(*args, **kwargs)
+        response.headers.update(headers)
+        return result
+    
+    return inner
+
+
+# For cached routes without ETags: browsers revalidate every time, so a
+# write is visible as soon as the server-side entry is invalidated
+NO_BROWSER_CACHE_CONTROL = "private, no-cache"
+
+
+def no_browser_cache(func):
+    """
+    Replace the Cache-Control @cache sets (max-age=<expire>)
+    
+    Goes above @cache; otherwise browsers reuse the response for the whole
+    expire after a write, whatever the server cache holds.
+    """
+    @wraps(func)
+    async def inner(*args, **kwargs):
+        result = await func(*args, **kwargs)
+        kwargs["response"].headers["Cache-Control"] = NO_BROWSER_CACHE_CONTROL
+        return result
+    
+    return inner
+
+
+def _user_key(user_id: int) -> str:
+    return f"{CACHE_PREFIX}:user:{user_id}"
+
+
+async def get_cached_user(user_id: int) -> Optional[Dict]:
+    """Return cached user columns, or None on a miss"""
+    try:
+        raw = await redis_client.get(_user_key(user_id))
+    except Exception as e:
+        logger.warning(f"User cache read failed for user {user_id}: {str(e)}")
+        return None
+    
+    if raw is None:
+        return None
+    
+    data = json.loads(raw)
+    if data["created_at"]:
+        data["created_at"] = datetime.fromisoformat(data["created_at"])
+    return data
+
+
+async def cache_user(user) -> None:
+    """Store the user's cached columns"""
+    data = {field: getattr(user, field) for field in USER_CACHE_FIELDS}
+    if data["created_at"]:
+        data["created_at"] = data["created_at"].isoformat()
+    
+    try:
+        await redis_client.setex(
+            _user_key(user.id), settings.user_cache_ttl_seconds, json.dumps(data)
+        )
+    except Exception as e:
+        logger.warning(f"User cache write failed for user {user.id}: {str(e)}")
+
+
+async def invalidate_user(user_id: int) -> None:
+    """Drop a user's cached columns after they change"""
+    try:
+        await redis_client.delete(_user_key(user_id))
+    except Exception as e:
+        logger.warning(f"User cache invalidation failed for user {user_id}: {str(e)}")
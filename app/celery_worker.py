@@ -0,0 +1,173 @@
+from celery import Celery
+from celery.signals import worker_process_init
+from collections import defaultdict
+from sqlalchemy import select, update
+from typing import List
+from app.config import settings
+from app.database import SessionLocal
+from app.models import User, Video
+from app.cache import invalidate_user_responses_sync
+from app.services import transcription_service, sheets_service
+from app.services.transcription import get_whisper_model
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Videos per transcribe_videos task; each task pipelines its downloads
+TRANSCRIPTION_BATCH_SIZE = 8
+
+# Run with: celery -A app.celery_worker worker --loglevel=info
+celery_app = Celery("viral_content_tracker", broker=settings.redis_url)
+celery_app.conf.update(
+    task_acks_late=True,  # Redeliver if a worker dies mid-transcription
+    worker_prefetch_multiplier=1,  # Transcriptions are long; don't hoard tasks
+    task_ignore_result=True,
+    # Children load Whisper in worker_process_init, before reporting in; the
+    # 4s default would kill them mid-load (longer still on a cold download)
+    worker_proc_alive_timeout=300,
+)
+
+
+# Statuses a transcription ends in; "no_speech" marks clips VAD found silent
+FINISHED_STATUSES = ("completed", "no_speech")
+
+
+def _finished_status(transcription: str) -> str:
+    return "completed" if transcription else "no_speech"
+
+
+@worker_process_init.connect
+def load_whisper_model(**kwargs):
+    """Load Whisper in each pool process after fork, before its first task"""
+    get_whisper_model()
+
+
+@celery_app.task(name="transcribe_video")
+def transcribe_video_task(video_id: int):
+    """Worker task to transcribe a single video"""
+    db = SessionLocal()
+    user_id = None
+    
+    try:
+        video = db.get(Video, video_id)
+        if not video:
+            return
+        
+        user_id = video.user_id
+        
+        video.transcription_status = "processing"
+        db.commit()
+        
+        # Run transcription
+        transcription = transcription_service.transcribe_video_sync(video.video_url)
+        
+        video.transcription = transcription
+        video.transcription_status = _finished_status(transcription)
+        db.commit()
+        
+        # Update Google Sheet if user has one connected
+        user = db.get(User, video.user_id)
+        if user and user.google_sheet_id:
+            sheets_service.update_transcription_in_sheet(
+                sheet_id=user.google_sheet_id,
+                video_url=video.video_url,
+                platform=video.platform,
+                transcription=transcription,
+                status=video.transcription_status
+            )
+        
+    except Exception as e:
+        # The session may hold a failed flush, and video may be unbound
+        db.rollback()
+        logger.error(f"Transcription failed for video {video_id}: {str(e)}")
+        db.execute(
+            update(Video).where(Video.id == video_id).values(transcription_status="failed")
+        )
+        db.commit()
+    
+    finally:
+        db.close()
+        if user_id is not None:
+            invalidate_user_responses_sync(user_id)
+
+
+@celery_app.task(name="transcribe_videos")
+def transcribe_videos_task(video_ids: List[int]):
+    """Worker task to transcribe several videos, overlapping downloads with Whisper"""
+    db = SessionLocal()
+    user_ids = set()
+    
+    try:
+        # Skip videos a redelivered batch already finished
+        videos = db.scalars(
+            select(Video).where(
+                Video.id.in_(video_ids),
+                Video.transcription_status.not_in(FINISHED_STATUSES)
+            )
+        ).all()
+        if not videos:
+            return
+        
+        for video in videos:
+            video.transcription_status = "processing"
+            user_ids.add(video.user_id)
+        db.commit()
+        
+        videos_by_url = {video.video_url: video for video in videos}
+        sheet_updates = defaultdict(list)
+        sheet_ids = {
+            user.id: user.google_sheet_id
+            for user in db.scalars(select(User).where(User.id.in_(user_ids)))
+        }
+        
+        results = transcription_service.transcribe_videos_batch(list(videos_by_url))
+        for video_url, transcription in results:
+            video = videos_by_url[video_url]
+            
+            if isinstance(transcription, Exception):
+                video.transcription_status = "failed"
+                db.commit()
+                logger.error(f"Transcription failed for video {video.id}: {str(transcription)}")
+                continue
+            
+            video.transcription = transcription
+            video.transcription_status = _finished_status(transcription)
+            db.commit()
+            
+            if sheet_ids.get(video.user_id):
+                sheet_updates[sheet_ids[video.user_id]].append({
+                    "video_url": video.video_url,
+                    "platform": video.platform,
+                    "transcription": transcription,
+                    "status": video.transcription_status
+                })
+        
+        # One Sheets write per connected sheet for the whole batch
+        for sheet_id, updates in sheet_updates.items():
+            sheets_service.update_transcriptions_batch(sheet_id, updates)
+        
+    except Exception as e:
+        db.rollback()
+        logger.error(f"Batch transcription failed for videos {video_ids}: {str(e)}")
+        db.execute(
+            update(Video).where(
+                Video.id.in_(video_ids),
+                Video.transcription_status == "processing"
+            ).values(transcription_status="failed")
+        )
+        db.commit()
+    
+    finally:
+        db.close()
+        for user_id in user_ids:
+            invalidate_user_responses_sync(user_id)
+
+
+def enqueue_transcriptions(video_ids: List[int]) -> int:
+    """Queue transcription tasks for many videos over one broker connection"""
+    with celery_app.producer_or_acquire() as producer:
+        for i in range(0, len(video_ids), TRANSCRIPTION_BATCH_SIZE):
+            transcribe_videos_task.apply_async(
+                (list(video_ids[i:i + TRANSCRIPTION_BATCH_SIZE]),), producer=producer
+            )
+    return len(video_ids)
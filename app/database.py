@@ -1,17 +1,101 @@
-from sqlalchemy import create_engine
+from sqlalchemy import Table, column, create_engine, table, text
+from sqlalchemy.sql.expression import TableClause
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import NullPool
 from app.config import settings
+from typing import Dict, List
+import enum
 
-engine = create_engine(settings.database_url)
+# Sync engine for the Celery worker
+engine = create_engine(
+    settings.database_url,
+    pool_size=settings.db_pool_size,
+    max_overflow=settings.db_max_overflow,
+    pool_timeout=settings.db_pool_timeout,
+    pool_recycle=settings.db_pool_recycle,
+    pool_pre_ping=True  # Drop stale connections instead of erroring
+)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+# Async engine (asyncpg) so DB waits don't block the event loop
+if settings.db_behind_pgbouncer:
+    # PgBouncer multiplexes connections, so don't hold a second pool here;
+    # transaction pooling also can't keep asyncpg's prepared statements
+    async_pool_kwargs = {
+        "poolclass": NullPool,
+        "connect_args": {"statement_cache_size": 0}
+    }
+else:
+    async_pool_kwargs = {
+        "pool_size": settings.db_pool_size,
+        "max_overflow": settings.db_max_overflow,
+        "pool_timeout": settings.db_pool_timeout,
+        "pool_recycle": settings.db_pool_recycle,
+        "pool_pre_ping": True
+    }
+
+async_engine = create_async_engine(
+    settings.database_url.replace("postgresql://", "postgresql+asyncpg://", 1),
+    **async_pool_kwargs
+)
+AsyncSessionLocal = async_sessionmaker(
+    bind=async_engine,
+    class_=AsyncSession,
+    autoflush=False,
+    expire_on_commit=False  # Keep loaded attributes usable after commit
+)
+
 Base = declarative_base()
 
 
-def get_db():
+async def get_db():
     """Dependency to get database session"""
-    db = SessionLocal()
-    try:
+    async with AsyncSessionLocal() as db:
         yield db
-    finally:
-        db.close()
+
+
+# Batches larger than this are loaded with COPY instead of multi-row INSERTs
+COPY_THRESHOLD = 100
+
+
+async def copy_to_staging(
+    db: AsyncSession,
+    target: Table,
+    columns: List[str],
+    rows: List[Dict]
+) -> TableClause:
+    """
+    COPY rows into a temp table with the target's column types
+    
+    COPY can't resolve conflicts, so callers finish with an
+    INSERT ... SELECT ... ON CONFLICT from the returned staging table.
+    The staging table is dropped when the transaction commits.
+    """
+    staging_name = f"_staging_{target.name}"
+    column_list = ", ".join(columns)
+    
+    # DDL goes through the session: the asyncpg adapter only sends BEGIN on
+    # its first statement, and in autocommit ON COMMIT DROP would drop the
+    # table before the raw COPY below reaches it
+    conn = await db.connection()
+    await conn.execute(text(f"DROP TABLE IF EXISTS {staging_name}"))
+    await conn.execute(text(
+        f"CREATE TEMP TABLE {staging_name} ON COMMIT DROP AS "
+        f"SELECT {column_list} FROM {target.name} WITH NO DATA"
+    ))
+    
+    raw = (await conn.get_raw_connection()).driver_connection
+    
+    # SQLAlchemy stores Python enums by member name
+    records = [
+        tuple(
+            row[c].name if isinstance(row[c], enum.Enum) else row[c]
+            for c in columns
+        )
+        for row in rows
+    ]
+    await raw.copy_records_to_table(staging_name, records=records, columns=columns)
+    
+    return table(staging_name, *[column(c) for c in columns])
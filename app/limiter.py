@@ -0,0 +1,6 @@
+from slowapi import Limiter
+from slowapi.util import get_remote_address
+from app.config import settings
+
+# Shared Redis storage so limits hold across uvicorn workers
+limiter = Limiter(key_func=get_remote_address, storage_uri=settings.redis_url)
@@ -1,8 +1,17 @@
 from fastapi import FastAPI
+from fastapi.responses import ORJSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
+from sqlalchemy import text
+from fastapi_cache import FastAPICache
+from fastapi_cache.backends.redis import RedisBackend
+from slowapi import _rate_limit_exceeded_handler
+from slowapi.errors import RateLimitExceeded
 
-from app.database import engine, Base
+from app.cache import CACHE_PREFIX, ORJSONCoder, redis_client
+from app.config import settings
+from app.database import async_engine, Base
+from app.limiter import limiter
 from app.routers import (
     auth_router,
     keywords_router,
@@ -14,19 +23,32 @@ from app.routers import (
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    """Application lifespan handler - creates tables on startup"""
-    # Create database tables
-    Base.metadata.create_all(bind=engine)
+    """Application lifespan handler - creates tables and response cache on startup"""
+    # Create database tables in development only; production schema comes
+    # from Alembic migrations (alembic upgrade head)
+    if settings.environment == "development":
+        async with async_engine.begin() as conn:
+            await conn.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+            await conn.run_sync(Base.metadata.create_all)
+    
+    # Response cache backed by the shared Redis instance
+    FastAPICache.init(RedisBackend(redis_client), prefix=CACHE_PREFIX, coder=ORJSONCoder)
     yield
+    await redis_client.close()
 
 
 app = FastAPI(
     title="Viral Content Tracker",
     description="Track and transcribe viral TikTok and Instagram content",
     version="1.0.0",
-    lifespan=lifespan
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse
 )
 
+# Rate limiting (login throttling)
+app.state.limiter = limiter
+app.add_exception_handler(RateLimitExceeded, _rate_limit_exceeded_handler)
+
 # CORS middleware - adjust origins for production
 app.add_middleware(
     CORSMiddleware,
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Boolean, DateTime, ForeignKey, Text, JSON, Enum
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, ForeignKey, Text, JSON, Enum, Index, text
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.database import Base
@@ -41,6 +41,12 @@ class User(Base):
 
 class Keyword(Base):
     __tablename__ = "keywords"
+    __table_args__ = (
+        Index("ix_keywords_user_active", "user_id", "is_active"),
+        Index("ix_keywords_user_platform_active", "user_id", "platform", "is_active"),
+        # Conflict target for bulk inserts; also closes the check-then-insert race
+        Index("uq_keywords_user_keyword_platform", "user_id", "keyword", "platform", unique=True),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
@@ -57,6 +63,32 @@ class Keyword(Base):
 
 class Video(Base):
     __tablename__ = "videos"
+    __table_args__ = (
+        # Each index matches a filter + ORDER BY chain in the videos router
+        Index("ix_videos_user_status", "user_id", "transcription_status"),
+        Index("ix_videos_user_scraped_likes", "user_id", text("scraped_at DESC"), text("likes DESC")),
+        Index("ix_videos_user_platform_scraped", "user_id", "platform", text("scraped_at DESC")),
+        Index("ix_videos_user_keyword_likes", "user_id", "keyword_id", text("likes DESC")),
+        Index(
+            "ix_videos_user_pending_scraped",
+            "user_id",
+            text("scraped_at DESC"),
+            postgresql_where=text("transcription_status = 'pending'")
+        ),
+        # Trigram indexes (pg_trgm) so search's ILIKE '%q%' avoids a full scan
+        Index(
+            "ix_videos_description_trgm",
+            "description",
+            postgresql_using="gin",
+            postgresql_ops={"description": "gin_trgm_ops"}
+        ),
+        Index(
+            "ix_videos_transcription_trgm",
+            "transcription",
+            postgresql_using="gin",
+            postgresql_ops={"transcription": "gin_trgm_ops"}
+        ),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
@@ -78,7 +110,7 @@ class Video(Base):
     
     # Transcription
     transcription = Column(Text, nullable=True)
-    transcription_status = Column(String(50), default="pending")  # pending, processing, completed, failed
+    transcription_status = Column(String(50), default="pending")  # pending, processing, completed, no_speech, failed
     
     # Metadata
     posted_at = Column(DateTime(timezone=True), nullable=True)
@@ -86,11 +118,18 @@ class Video(Base):
     
     # Relationships
     user = relationship("User", back_populates="videos")
-    keyword = relationship("Keyword", back_populates="videos")
+    # Never lazy-loaded: queries that serialize it (VideoWithKeyword) must
+    # ask for it with selectinload(Video.keyword), so a missed load raises
+    # instead of issuing one query per video
+    keyword = relationship("Keyword", back_populates="videos", lazy="raise")
 
 
 class ScrapeJob(Base):
     __tablename__ = "scrape_jobs"
+    __table_args__ = (
+        # Serves the "latest jobs first" listing with LIMIT
+        Index("ix_jobs_user_created", "user_id", "created_at"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
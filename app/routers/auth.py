@@ -1,6 +1,9 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+from fastapi.responses import ORJSONResponse
+from fastapi.concurrency import run_in_threadpool
 from fastapi.security import OAuth2PasswordRequestForm
-from sqlalchemy.orm import Session
+from sqlalchemy import exists, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from datetime import timedelta
 
 from app.database import get_db
@@ -8,55 +11,58 @@ from app.models import User, UserSettings
 from app.schemas import UserCreate, UserResponse, Token, UserLogin
 from app.auth import (
     get_password_hash,
-    verify_password,
+    authenticate_user,
     create_access_token,
     get_current_user
 )
+from app.cache import cache_user, invalidate_user
 from app.config import settings
+from app.limiter import limiter
 
-router = APIRouter(prefix="/api/auth", tags=["Authentication"])
+router = APIRouter(prefix="/api/auth", tags=["Authentication"], default_response_class=ORJSONResponse)
 
 
 @router.post("/signup", response_model=UserResponse)
-async def signup(user_data: UserCreate, db: Session = Depends(get_db)):
+async def signup(user_data: UserCreate, db: AsyncSession = Depends(get_db)):
     """Register a new user"""
     # Check if email already exists
-    existing_user = db.query(User).filter(User.email == user_data.email).first()
-    if existing_user:
+    result = await db.execute(select(exists().where(User.email == user_data.email)))
+    if result.scalar():
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Email already registered"
         )
     
     # Create new user
-    hashed_password = get_password_hash(user_data.password)
+    hashed_password = await run_in_threadpool(get_password_hash, user_data.password)
     new_user = User(
         email=user_data.email,
         hashed_password=hashed_password,
         company_name=user_data.company_name
     )
     db.add(new_user)
-    db.commit()
-    db.refresh(new_user)
+    await db.commit()
+    await db.refresh(new_user)
     
     # Create default settings for user
     user_settings = UserSettings(user_id=new_user.id)
     db.add(user_settings)
-    db.commit()
+    await db.commit()
     
     return new_user
 
 
 @router.post("/login", response_model=Token)
+@limiter.limit(settings.login_rate_limit)
 async def login(
+    request: Request,
     form_data: OAuth2PasswordRequestForm = Depends(),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Login and get access token"""
-    # Find user
-    user = db.query(User).filter(User.email == form_data.username).first()
+    user = await authenticate_user(db, form_data.username, form_data.password)
     
-    if not user or not verify_password(form_data.password, user.hashed_password):
+    if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect email or password",
@@ -69,9 +75,12 @@ async def login(
             detail="Account is disabled"
         )
     
+    # Warm the user cache for the requests that follow
+    await cache_user(user)
+    
     # Create access token
     access_token = create_access_token(
-        data={"sub": user.id},
+        data={"sub": str(user.id)},
         expires_delta=timedelta(minutes=settings.access_token_expire_minutes)
     )
     
@@ -79,11 +88,16 @@ async def login(
 
 
 @router.post("/login/json", response_model=Token)
-async def login_json(user_data: UserLogin, db: Session = Depends(get_db)):
+@limiter.limit(settings.login_rate_limit)
+async def login_json(
+    request: Request,
+    user_data: UserLogin,
+    db: AsyncSession = Depends(get_db)
+):
     """Login with JSON body (alternative to form data)"""
-    user = db.query(User).filter(User.email == user_data.email).first()
+    user = await authenticate_user(db, user_data.email, user_data.password)
     
-    if not user or not verify_password(user_data.password, user.hashed_password):
+    if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect email or password"
@@ -95,8 +109,10 @@ async def login_json(user_data: UserLogin, db: Session = Depends(get_db)):
             detail="Account is disabled"
         )
     
+    await cache_user(user)
+    
     access_token = create_access_token(
-        data={"sub": user.id},
+        data={"sub": str(user.id)},
         expires_delta=timedelta(minutes=settings.access_token_expire_minutes)
     )
     
@@ -112,13 +128,16 @@ async def get_me(current_user: User = Depends(get_current_user)):
 @router.put("/me", response_model=UserResponse)
 async def update_me(
     company_name: str = None,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
     """Update current user info"""
+    # current_user may be a cached snapshot; load the row to modify
+    user = await db.get(User, current_user.id)
     if company_name is not None:
-        current_user.company_name = company_name
+        user.company_name = company_name
     
-    db.commit()
-    db.refresh(current_user)
-    return current_user
+    await db.commit()
+    await db.refresh(user)
+    await invalidate_user(user.id)
+    return user
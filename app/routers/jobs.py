@@ -1,15 +1,65 @@
-from fastapi import APIRouter, Depends, HTTPException, status, BackgroundTasks
-from sqlalchemy.orm import Session
-from typing import List
-from datetime import datetime
+from fastapi import APIRouter, Depends, HTTPException, status, BackgroundTasks, Response
+from fastapi.responses import ORJSONResponse
+from fastapi.concurrency import run_in_threadpool
+from fastapi_cache.decorator import cache
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import raiseload
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from typing import List, Dict, Optional
+from datetime import datetime, timezone
+import asyncio
+import logging
+from collections import defaultdict
 
-from app.database import get_db
+from app.database import get_db, copy_to_staging, COPY_THRESHOLD
 from app.models import User, Keyword, Video, ScrapeJob, UserSettings, PlatformEnum, JobStatusEnum
-from app.schemas import JobResponse, JobCreate, VideoResponse, DashboardStats
+from app.schemas import JobResponse, JobResponseList, JobCreate, VideoResponse, DashboardStats
 from app.auth import get_current_user
-from app.services import apify_service, transcription_service, sheets_service
+from app.config import settings
+from app.cache import (
+    DASHBOARD_NAMESPACE, no_browser_cache, no_db_key_builder, invalidate_user_responses
+)
+from app.services import apify_service, sheets_service
+from app.celery_worker import transcribe_video_task, enqueue_transcriptions
 
-router = APIRouter(prefix="/api/jobs", tags=["Jobs"])
+logger = logging.getLogger(__name__)
+
+router = APIRouter(prefix="/api/jobs", tags=["Jobs"], default_response_class=ORJSONResponse)
+
+# Scrape job progress is committed once per this many keywords
+KEYWORD_COMMIT_BATCH = 10
+
+# TikTok keywords sent to one actor run (bigger batches start fewer actors
+# but scrape serially inside the run)
+TIKTOK_KEYWORDS_PER_RUN = 5
+
+
+async def insert_videos(db: AsyncSession, rows: List[Dict]) -> int:
+    """Insert video rows in one statement, returning how many were new"""
+    if not rows:
+        return 0
+    
+    # The unique index on video_url skips videos we already have
+    if len(rows) > COPY_THRESHOLD:
+        columns = list(rows[0])
+        staging = await copy_to_staging(db, Video.__table__, columns, rows)
+        result = await db.execute(
+            pg_insert(Video)
+            .from_select(columns, select(*staging.c))
+            .on_conflict_do_nothing(index_elements=[Video.video_url])
+            .returning(Video.id)
+        )
+    else:
+        # ORM bulk INSERT: rows go as parameter sets (no per-object unit of
+        # work), paged into multi-row VALUES batches under the bind limit
+        result = await db.execute(
+            pg_insert(Video)
+            .on_conflict_do_nothing(index_elements=[Video.video_url])
+            .returning(Video.id),
+            rows
+        )
+    return len(result.fetchall())
 
 
 async def run_scrape_job(
@@ -19,172 +69,206 @@ async def run_scrape_job(
     db_session_factory=None
 ):
     """Background task to run a scrape job"""
-    from app.database import SessionLocal
-    db = SessionLocal()
+    from app.database import AsyncSessionLocal
+    db = AsyncSessionLocal()
+    job = None
     
     try:
         # Get job and user
-        job = db.query(ScrapeJob).filter(ScrapeJob.id == job_id).first()
-        user = db.query(User).filter(User.id == user_id).first()
-        user_settings = db.query(UserSettings).filter(UserSettings.user_id == user_id).first()
+        job = await db.get(ScrapeJob, job_id)
+        user = await db.get(User, user_id)
+        user_settings = (await db.execute(
+            select(UserSettings).where(UserSettings.user_id == user_id)
+        )).scalar_one_or_none()
         
         if not job or not user:
             return
         
         # Update job status
         job.status = JobStatusEnum.RUNNING
-        job.started_at = datetime.utcnow()
-        db.commit()
+        job.started_at = datetime.now(timezone.utc)
+        await db.commit()
         
         # Get keywords to process
-        keywords_query = db.query(Keyword).filter(
+        keywords_query = select(Keyword).where(
             Keyword.user_id == user_id,
             Keyword.is_active == True
         )
         
         if platform:
-            keywords_query = keywords_query.filter(Keyword.platform == platform)
+            keywords_query = keywords_query.where(Keyword.platform == platform)
         
-        keywords = keywords_query.all()
+        keywords = (await db.execute(keywords_query)).scalars().all()
         
-        total_videos = 0
+        min_likes = user_settings.min_likes if user_settings else 1000
+        date_filter = user_settings.date_filter if user_settings else "this_week"
         
-        for keyword in keywords:
-            try:
-                # Scrape videos
-                videos_data = await apify_service.scrape_by_platform(
-                    platform=keyword.platform,
-                    keyword=keyword.keyword,
-                    max_results=keyword.results_per_run,
-                    min_likes=user_settings.min_likes if user_settings else 1000,
-                    date_filter=user_settings.date_filter if user_settings else "this_week"
-                )
-                
-                # Save videos to database
-                for video_data in videos_data:
-                    # Check for duplicate
-                    existing = db.query(Video).filter(
-                        Video.video_url == video_data["video_url"]
-                    ).first()
-                    
-                    if existing:
-                        continue
-                    
-                    new_video = Video(
-                        user_id=user_id,
-                        keyword_id=keyword.id,
-                        platform=video_data["platform"],
-                        video_url=video_data["video_url"],
-                        video_id=video_data.get("video_id"),
-                        author_username=video_data.get("author_username"),
-                        author_name=video_data.get("author_name"),
-                        description=video_data.get("description"),
-                        likes=video_data.get("likes", 0),
-                        comments=video_data.get("comments", 0),
-                        shares=video_data.get("shares", 0),
-                        views=video_data.get("views", 0),
-                        posted_at=video_data.get("posted_at"),
-                        transcription_status="pending"
-                    )
-                    db.add(new_video)
-                    total_videos += 1
-                
-                # Add to Google Sheet if connected
-                if user.google_sheet_id:
-                    sheets_service.add_videos_batch(
-                        sheet_id=user.google_sheet_id,
-                        videos=videos_data,
+        # Cap concurrent Apify runs to stay within rate limits
+        sem = asyncio.Semaphore(settings.scrape_concurrency)
+        sheet_batches = defaultdict(list)
+        
+        def to_rows(keyword: Keyword, videos_data: List[Dict]) -> List[Dict]:
+            """Queue a keyword's videos for the sheet and build its DB rows"""
+            # Queue for the single Google Sheet flush after the loop
+            sheet_batches[(keyword.platform, keyword.keyword)].extend(videos_data)
+            
+            return [
+                {
+                    "user_id": user_id,
+                    "keyword_id": keyword.id,
+                    "platform": video_data["platform"],
+                    "video_url": video_data["video_url"],
+                    "video_id": video_data.get("video_id"),
+                    "author_username": video_data.get("author_username"),
+                    "author_name": video_data.get("author_name"),
+                    "description": video_data.get("description"),
+                    "likes": video_data.get("likes", 0),
+                    "comments": video_data.get("comments", 0),
+                    "shares": video_data.get("shares", 0),
+                    "views": video_data.get("views", 0),
+                    "posted_at": video_data.get("posted_at"),
+                    "transcription_status": "pending"
+                }
+                for video_data in videos_data
+            ]
+        
+        async def process_keyword(keyword: Keyword) -> List[Optional[List[Dict]]]:
+            """Scrape one keyword, returning its video rows (None on failure)"""
+            async with sem:
+                try:
+                    # Scrape videos
+                    videos_data = await apify_service.scrape_by_platform(
                         platform=keyword.platform,
-                        keyword=keyword.keyword
+                        keyword=keyword.keyword,
+                        max_results=keyword.results_per_run,
+                        min_likes=min_likes,
+                        date_filter=date_filter
                     )
-                
-                job.keywords_processed += 1
-                db.commit()
-                
-            except Exception as e:
-                print(f"Error processing keyword {keyword.keyword}: {str(e)}")
-                continue
+                    return [to_rows(keyword, videos_data)]
+                    
+                except Exception as e:
+                    logger.error(f"Error processing keyword {keyword.keyword}: {str(e)}")
+                    return [None]
         
-        # Update job completion
-        job.status = JobStatusEnum.COMPLETED
-        job.videos_found = total_videos
-        job.completed_at = datetime.utcnow()
-        db.commit()
+        async def process_tiktok_batch(batch: List[Keyword]) -> List[Optional[List[Dict]]]:
+            """Scrape TikTok keywords in one actor run, returning rows per keyword"""
+            async with sem:
+                try:
+                    results = await apify_service.scrape_tiktok_batch(
+                        keywords=[keyword.keyword for keyword in batch],
+                        max_results=max(keyword.results_per_run for keyword in batch),
+                        min_likes=min_likes,
+                        date_filter=date_filter
+                    )
+                    # Lists are sorted by likes, so slicing keeps each keyword's top N
+                    return [
+                        to_rows(keyword, results[keyword.keyword][:keyword.results_per_run])
+                        for keyword in batch
+                    ]
+                    
+                except Exception as e:
+                    logger.error(f"Error processing keywords {[k.keyword for k in batch]}: {str(e)}")
+                    return [None] * len(batch)
         
-    except Exception as e:
-        job.status = JobStatusEnum.FAILED
-        job.error_message = str(e)
-        job.completed_at = datetime.utcnow()
-        db.commit()
-    
-    finally:
-        db.close()
-
-
-async def run_transcription_job(video_id: int):
-    """Background task to transcribe a single video"""
-    from app.database import SessionLocal
-    db = SessionLocal()
-    
-    try:
-        video = db.query(Video).filter(Video.id == video_id).first()
-        if not video:
-            return
+        # TikTok's actor takes several queries per run, so it starts once per
+        # batch; other platforms run one actor per keyword
+        tiktok_keywords = [k for k in keywords if k.platform == PlatformEnum.TIKTOK]
+        tasks = [
+            process_tiktok_batch(tiktok_keywords[i:i + TIKTOK_KEYWORDS_PER_RUN])
+            for i in range(0, len(tiktok_keywords), TIKTOK_KEYWORDS_PER_RUN)
+        ]
+        tasks.extend(
+            process_keyword(keyword) for keyword in keywords
+            if keyword.platform != PlatformEnum.TIKTOK
+        )
         
-        video.transcription_status = "processing"
-        db.commit()
+        # Only this coroutine touches the session; videos and progress are
+        # written together every KEYWORD_COMMIT_BATCH keywords
+        total_videos = 0
+        keywords_processed = 0
+        uncommitted_keywords = 0
+        pending_rows = []
         
-        # Run transcription
-        transcription = await transcription_service.transcribe_video(video.video_url)
+        for task in asyncio.as_completed(tasks):
+            for rows in await task:
+                if rows is not None:
+                    pending_rows.extend(rows)
+                    keywords_processed += 1
+                uncommitted_keywords += 1
+            
+            if uncommitted_keywords >= KEYWORD_COMMIT_BATCH:
+                total_videos += await insert_videos(db, pending_rows)
+                pending_rows = []
+                uncommitted_keywords = 0
+                job.keywords_processed = keywords_processed
+                await db.commit()
         
-        video.transcription = transcription
-        video.transcription_status = "completed"
-        db.commit()
+        total_videos += await insert_videos(db, pending_rows)
+        job.keywords_processed = keywords_processed
         
-        # Update Google Sheet if user has one connected
-        user = db.query(User).filter(User.id == video.user_id).first()
-        if user and user.google_sheet_id:
-            sheets_service.update_transcription_in_sheet(
+        # Add to Google Sheet if connected
+        if user.google_sheet_id and sheet_batches:
+            await run_in_threadpool(
+                sheets_service.add_videos_batch_multi,
                 sheet_id=user.google_sheet_id,
-                video_url=video.video_url,
-                platform=video.platform,
-                transcription=transcription
+                batches=sheet_batches
             )
         
+        # Update job completion
+        job.status = JobStatusEnum.COMPLETED
+        job.videos_found = total_videos
+        job.completed_at = datetime.now(timezone.utc)
+        await db.commit()
+        
     except Exception as e:
-        video.transcription_status = "failed"
-        db.commit()
-        print(f"Transcription failed for video {video_id}: {str(e)}")
+        # The failed statement may have aborted the transaction; start clean
+        # so the job can still be marked FAILED (a RUNNING job blocks new ones)
+        await db.rollback()
+        if job is not None:
+            job.status = JobStatusEnum.FAILED
+            job.error_message = str(e)
+            job.completed_at = datetime.now(timezone.utc)
+            await db.commit()
     
     finally:
-        db.close()
+        await db.close()
+        await invalidate_user_responses(user_id)
 
 
 @router.get("/", response_model=List[JobResponse])
 async def get_jobs(
     limit: int = 10,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
     """Get recent jobs for current user"""
-    return db.query(ScrapeJob).filter(
-        ScrapeJob.user_id == current_user.id
-    ).order_by(ScrapeJob.created_at.desc()).limit(limit).all()
+    result = await db.execute(
+        select(ScrapeJob).options(
+            raiseload("*")  # JobResponse has no relationships; never lazy-load per row
+        ).where(
+            ScrapeJob.user_id == current_user.id
+        ).order_by(ScrapeJob.created_at.desc()).limit(limit)
+    )
+    jobs = JobResponseList.validate_python(result.scalars().all(), from_attributes=True)
+    return Response(content=JobResponseList.dump_json(jobs), media_type="application/json")
 
 
 @router.post("/scrape", response_model=JobResponse)
 async def start_scrape_job(
     job_data: JobCreate,
     background_tasks: BackgroundTasks,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
     """Start a new scrape job"""
     # Check for running jobs
-    running_job = db.query(ScrapeJob).filter(
-        ScrapeJob.user_id == current_user.id,
-        ScrapeJob.status == JobStatusEnum.RUNNING
-    ).first()
+    result = await db.execute(
+        select(ScrapeJob).where(
+            ScrapeJob.user_id == current_user.id,
+            ScrapeJob.status == JobStatusEnum.RUNNING
+        )
+    )
+    running_job = result.scalars().first()
     
     if running_job:
         raise HTTPException(
@@ -199,8 +283,8 @@ async def start_scrape_job(
         status=JobStatusEnum.PENDING
     )
     db.add(new_job)
-    db.commit()
-    db.refresh(new_job)
+    await db.commit()
+    await db.refresh(new_job)
     
     # Start background task
     background_tasks.add_task(
@@ -216,14 +300,17 @@ async def start_scrape_job(
 @router.get("/{job_id}", response_model=JobResponse)
 async def get_job(
     job_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
     """Get a specific job"""
-    job = db.query(ScrapeJob).filter(
-        ScrapeJob.id == job_id,
-        ScrapeJob.user_id == current_user.id
-    ).first()
+    result = await db.execute(
+        select(ScrapeJob).where(
+            ScrapeJob.id == job_id,
+            ScrapeJob.user_id == current_user.id
+        )
+    )
+    job = result.scalar_one_or_none()
     
     if not job:
         raise HTTPException(
@@ -237,15 +324,17 @@ async def get_job(
 @router.post("/transcribe/{video_id}")
 async def start_transcription(
     video_id: int,
-    background_tasks: BackgroundTasks,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
     """Start transcription for a specific video"""
-    video = db.query(Video).filter(
-        Video.id == video_id,
-        Video.user_id == current_user.id
-    ).first()
+    result = await db.execute(
+        select(Video).where(
+            Video.id == video_id,
+            Video.user_id == current_user.id
+        )
+    )
+    video = result.scalar_one_or_none()
     
     if not video:
         raise HTTPException(
@@ -259,66 +348,78 @@ async def start_transcription(
             detail="Transcription already in progress"
         )
     
-    background_tasks.add_task(run_transcription_job, video_id=video.id)
+    # Queue on the Celery worker so transcription never runs in the API process
+    # Publishing is a blocking broker round trip; keep it off the event loop
+    await run_in_threadpool(transcribe_video_task.delay, video.id)
     
     return {"message": "Transcription started", "video_id": video.id}
 
 
 @router.post("/transcribe-all")
 async def transcribe_all_pending(
-    background_tasks: BackgroundTasks,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
     """Start transcription for all pending videos"""
-    pending_videos = db.query(Video).filter(
-        Video.user_id == current_user.id,
-        Video.transcription_status == "pending"
-    ).all()
+    # Only the ids are needed; skip loading description/transcription text
+    result = await db.execute(
+        select(Video.id).where(
+            Video.user_id == current_user.id,
+            Video.transcription_status == "pending"
+        )
+    )
+    pending_ids = result.scalars().all()
     
-    for video in pending_videos:
-        background_tasks.add_task(run_transcription_job, video_id=video.id)
+    # One broker connection for the whole batch, off the event loop
+    await run_in_threadpool(enqueue_transcriptions, pending_ids)
     
-    return {"message": f"Started transcription for {len(pending_videos)} videos"}
+    return {"message": f"Started transcription for {len(pending_ids)} videos"}
 
 
 @router.get("/dashboard/stats", response_model=DashboardStats)
+@no_browser_cache
+@cache(expire=60, namespace=DASHBOARD_NAMESPACE, key_builder=no_db_key_builder)
 async def get_dashboard_stats(
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
     """Get dashboard statistics"""
-    from datetime import date
+    from sqlalchemy import func
     
-    total_keywords = db.query(Keyword).filter(
+    # One round trip: video counts via FILTER aggregates over a single scan,
+    # keyword count as a scalar subquery
+    total_keywords = select(func.count(Keyword.id)).where(
         Keyword.user_id == current_user.id,
         Keyword.is_active == True
-    ).count()
-    
-    total_videos = db.query(Video).filter(
-        Video.user_id == current_user.id
-    ).count()
+    ).scalar_subquery()
     
-    today = date.today()
-    videos_today = db.query(Video).filter(
-        Video.user_id == current_user.id,
-        Video.scraped_at >= today
-    ).count()
-    
-    pending_transcriptions = db.query(Video).filter(
-        Video.user_id == current_user.id,
-        Video.transcription_status == "pending"
-    ).count()
+    counts = (await db.execute(
+        select(
+            total_keywords.label("total_keywords"),
+            func.count(Video.id).label("total_videos"),
+            func.count(Video.id).filter(
+                Video.scraped_at >= func.current_date()
+            ).label("videos_today"),
+            func.count(Video.id).filter(
+                Video.transcription_status == "pending"
+            ).label("pending_transcriptions")
+        ).where(
+            Video.user_id == current_user.id
+        )
+    )).one()
     
-    last_job = db.query(ScrapeJob).filter(
-        ScrapeJob.user_id == current_user.id
-    ).order_by(ScrapeJob.created_at.desc()).first()
+    result = await db.execute(
+        select(ScrapeJob).where(
+            ScrapeJob.user_id == current_user.id
+        ).order_by(ScrapeJob.created_at.desc()).limit(1)
+    )
+    last_job = result.scalars().first()
     
     return DashboardStats(
-        total_keywords=total_keywords,
-        total_videos=total_videos,
-        videos_today=videos_today,
-        pending_transcriptions=pending_transcriptions,
+        total_keywords=counts.total_keywords,
+        total_videos=counts.total_videos,
+        videos_today=counts.videos_today,
+        pending_transcriptions=counts.pending_transcriptions,
         last_job_status=last_job.status.value if last_job else None,
         last_job_time=last_job.completed_at if last_job else None
     )
@@ -1,52 +1,140 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from typing import List
+from fastapi import APIRouter, Depends, HTTPException, Response, status
+from fastapi.responses import ORJSONResponse
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from typing import Dict, List, Sequence
 
-from app.database import get_db
+from app.database import get_db, copy_to_staging, COPY_THRESHOLD
 from app.models import User, Keyword, PlatformEnum
-from app.schemas import KeywordCreate, KeywordUpdate, KeywordResponse, KeywordBulkCreate
+from app.schemas import (
+    KeywordCreate, KeywordUpdate, KeywordResponse, KeywordResponseList, KeywordBulkCreate
+)
 from app.auth import get_current_user
+from app.cache import invalidate_user_responses
 
-router = APIRouter(prefix="/api/keywords", tags=["Keywords"])
+router = APIRouter(prefix="/api/keywords", tags=["Keywords"], default_response_class=ORJSONResponse)
+
+# Columns KeywordResponse needs, for RETURNING clauses
+KEYWORD_RESPONSE_COLUMNS = (
+    Keyword.id,
+    Keyword.keyword,
+    Keyword.platform,
+    Keyword.is_active,
+    Keyword.results_per_run,
+    Keyword.created_at,
+)
+
+
+DUPLICATE_KEYWORD_DETAIL = "Keyword already exists for this platform"
+
+
+async def _commit_keyword(db: AsyncSession) -> None:
+    """Commit a keyword write, answering 400 when the unique index rejects it"""
+    try:
+        await db.commit()
+    except IntegrityError:
+        # Lost a race with a concurrent create, or renamed onto an existing keyword
+        await db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=DUPLICATE_KEYWORD_DETAIL
+        )
+
+
+async def insert_keywords(
+    db: AsyncSession,
+    user_id: int,
+    keywords: Sequence[str],
+    platform: PlatformEnum,
+    results_per_run: int
+) -> List[Dict]:
+    """
+    Insert keywords in one statement, skipping ones the user already has
+    
+    Returns the newly created keywords as KeywordResponse-shaped dicts,
+    read straight from RETURNING instead of refreshing ORM instances
+    """
+    rows = [
+        {
+            "user_id": user_id,
+            "keyword": kw,
+            "platform": platform,
+            "results_per_run": results_per_run,
+            "is_active": True
+        }
+        for kw in dict.fromkeys(keywords)  # Drop repeats, keep order
+    ]
+    
+    if not rows:
+        return []
+    
+    # The (user_id, keyword, platform) unique index makes duplicates a no-op
+    stmt = pg_insert(Keyword)
+    if len(rows) > COPY_THRESHOLD:
+        columns = list(rows[0])
+        staging = await copy_to_staging(db, Keyword.__table__, columns, rows)
+        stmt = stmt.from_select(columns, select(*staging.c))
+        params = None
+    else:
+        params = rows
+    
+    stmt = stmt.on_conflict_do_nothing(
+        index_elements=["user_id", "keyword", "platform"]
+    ).returning(*KEYWORD_RESPONSE_COLUMNS)
+    
+    result = await db.execute(stmt, params)
+    created = [dict(row) for row in result.mappings()]
+    await db.commit()
+    if created:
+        await invalidate_user_responses(user_id)
+    
+    return created
 
 
 @router.get("/", response_model=List[KeywordResponse])
 async def get_keywords(
     platform: PlatformEnum = None,
     active_only: bool = True,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
     """Get all keywords for current user"""
-    query = db.query(Keyword).filter(Keyword.user_id == current_user.id)
+    query = select(*KEYWORD_RESPONSE_COLUMNS).where(Keyword.user_id == current_user.id)
     
     if platform:
-        query = query.filter(Keyword.platform == platform)
+        query = query.where(Keyword.platform == platform)
     
     if active_only:
-        query = query.filter(Keyword.is_active == True)
+        query = query.where(Keyword.is_active == True)
     
-    return query.all()
+    keywords = KeywordResponseList.validate_python(
+        (await db.execute(query)).all(), from_attributes=True
+    )
+    return Response(content=KeywordResponseList.dump_json(keywords), media_type="application/json")
 
 
 @router.post("/", response_model=KeywordResponse)
 async def create_keyword(
     keyword_data: KeywordCreate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
     """Create a new keyword to track"""
-    # Check for duplicate
-    existing = db.query(Keyword).filter(
-        Keyword.user_id == current_user.id,
-        Keyword.keyword == keyword_data.keyword,
-        Keyword.platform == keyword_data.platform
-    ).first()
+    # Check for duplicate without loading the row
+    existing = await db.scalar(
+        select(1).where(
+            Keyword.user_id == current_user.id,
+            Keyword.keyword == keyword_data.keyword,
+            Keyword.platform == keyword_data.platform
+        ).limit(1)
+    )
     
     if existing:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Keyword already exists for this platform"
+            detail=DUPLICATE_KEYWORD_DETAIL
         )
     
     new_keyword = Keyword(
@@ -56,8 +144,9 @@ async def create_keyword(
         results_per_run=keyword_data.results_per_run
     )
     db.add(new_keyword)
-    db.commit()
-    db.refresh(new_keyword)
+    await _commit_keyword(db)
+    await db.refresh(new_keyword)
+    await invalidate_user_responses(current_user.id)
     
     return new_keyword
 
@@ -65,53 +154,29 @@ async def create_keyword(
 @router.post("/bulk", response_model=List[KeywordResponse])
 async def create_keywords_bulk(
     bulk_data: KeywordBulkCreate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
     """Create multiple keywords at once"""
-    created = []
-    
-    for kw in bulk_data.keywords:
-        # Skip duplicates
-        existing = db.query(Keyword).filter(
-            Keyword.user_id == current_user.id,
-            Keyword.keyword == kw,
-            Keyword.platform == bulk_data.platform
-        ).first()
-        
-        if existing:
-            continue
-        
-        new_keyword = Keyword(
-            user_id=current_user.id,
-            keyword=kw,
-            platform=bulk_data.platform,
-            results_per_run=bulk_data.results_per_run
-        )
-        db.add(new_keyword)
-        created.append(new_keyword)
-    
-    db.commit()
-    
-    for kw in created:
-        db.refresh(kw)
-    
-    return created
+    return await insert_keywords(
+        db,
+        user_id=current_user.id,
+        keywords=bulk_data.keywords,
+        platform=bulk_data.platform,
+        results_per_run=bulk_data.results_per_run
+    )
 
 
 @router.get("/{keyword_id}", response_model=KeywordResponse)
 async def get_keyword(
     keyword_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
     """Get a specific keyword"""
-    keyword = db.query(Keyword).filter(
-        Keyword.id == keyword_id,
-        Keyword.user_id == current_user.id
-    ).first()
+    keyword = await db.get(Keyword, keyword_id)
     
-    if not keyword:
+    if keyword is None or keyword.user_id != current_user.id:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Keyword not found"
@@ -124,16 +189,13 @@ async def get_keyword(
 async def update_keyword(
     keyword_id: int,
     keyword_data: KeywordUpdate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
     """Update a keyword"""
-    keyword = db.query(Keyword).filter(
-        Keyword.id == keyword_id,
-        Keyword.user_id == current_user.id
-    ).first()
+    keyword = await db.get(Keyword, keyword_id)
     
-    if not keyword:
+    if keyword is None or keyword.user_id != current_user.id:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Keyword not found"
@@ -148,8 +210,9 @@ async def update_keyword(
     if keyword_data.results_per_run is not None:
         keyword.results_per_run = keyword_data.results_per_run
     
-    db.commit()
-    db.refresh(keyword)
+    await _commit_keyword(db)
+    await db.refresh(keyword)
+    await invalidate_user_responses(current_user.id)
     
     return keyword
 
@@ -157,107 +220,89 @@ async def update_keyword(
 @router.delete("/{keyword_id}")
 async def delete_keyword(
     keyword_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
     """Delete a keyword"""
-    keyword = db.query(Keyword).filter(
-        Keyword.id == keyword_id,
-        Keyword.user_id == current_user.id
-    ).first()
+    keyword = await db.get(Keyword, keyword_id)
     
-    if not keyword:
+    if keyword is None or keyword.user_id != current_user.id:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Keyword not found"
         )
     
-    db.delete(keyword)
-    db.commit()
+    await db.delete(keyword)
+    await db.commit()
+    await invalidate_user_responses(current_user.id)
     
     return {"message": "Keyword deleted"}
 
 
-# Preset keywords for common industries
+# Preset keywords for common industries (tuples; never mutated per request)
 PRESET_KEYWORDS = {
-    "ai_automation": [
+    "ai_automation": (
         "AI", "AI Tools", "AI for business", "AI Automation", "AI Workflow",
         "AI Agent", "ChatGPT", "Claude", "N8N", "Vibecoding", "Vibecode",
         "Gemini", "Google AI Studio", "Deepseek", "Manus", "LLM", "Artificial Intelligence"
-    ],
-    "ecommerce": [
+    ),
+    "ecommerce": (
         "dropshipping", "ecommerce", "shopify", "amazon fba", "online store",
         "product sourcing", "retail arbitrage", "print on demand"
-    ],
-    "real_estate": [
+    ),
+    "real_estate": (
         "real estate investing", "house flipping", "rental property",
         "real estate agent", "property investment", "wholesale real estate"
-    ],
-    "fitness": [
+    ),
+    "fitness": (
         "workout", "fitness tips", "gym motivation", "weight loss",
         "muscle building", "home workout", "nutrition tips"
-    ],
-    "finance": [
+    ),
+    "finance": (
         "investing", "stock market", "crypto", "passive income",
         "side hustle", "make money online", "financial freedom"
-    ]
+    )
+}
+
+PRESET_INDUSTRIES = tuple(PRESET_KEYWORDS)
+
+# Built once at import; the presets never change at runtime
+PRESET_INDUSTRIES_RESPONSE = {
+    "industries": PRESET_INDUSTRIES,
+    "descriptions": {
+        "ai_automation": "AI tools, automation, and coding",
+        "ecommerce": "Online selling and dropshipping",
+        "real_estate": "Property and real estate investing",
+        "fitness": "Health, fitness, and wellness",
+        "finance": "Investing and making money"
+    }
 }
 
 
 @router.get("/presets/list")
 async def get_preset_industries():
     """Get available preset keyword industries"""
-    return {
-        "industries": list(PRESET_KEYWORDS.keys()),
-        "descriptions": {
-            "ai_automation": "AI tools, automation, and coding",
-            "ecommerce": "Online selling and dropshipping",
-            "real_estate": "Property and real estate investing",
-            "fitness": "Health, fitness, and wellness",
-            "finance": "Investing and making money"
-        }
-    }
+    return PRESET_INDUSTRIES_RESPONSE
 
 
 @router.post("/presets/{industry}", response_model=List[KeywordResponse])
 async def load_preset_keywords(
     industry: str,
     platform: PlatformEnum,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
     """Load preset keywords for an industry"""
     if industry not in PRESET_KEYWORDS:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
-            detail=f"Unknown industry. Available: {list(PRESET_KEYWORDS.keys())}"
-        )
-    
-    keywords = PRESET_KEYWORDS[industry]
-    created = []
-    
-    for kw in keywords:
-        existing = db.query(Keyword).filter(
-            Keyword.user_id == current_user.id,
-            Keyword.keyword == kw,
-            Keyword.platform == platform
-        ).first()
-        
-        if existing:
-            continue
-        
-        new_keyword = Keyword(
-            user_id=current_user.id,
-            keyword=kw,
-            platform=platform,
-            results_per_run=10
+            detail=f"Unknown industry. Available: {list(PRESET_INDUSTRIES)}"
         )
-        db.add(new_keyword)
-        created.append(new_keyword)
-    
-    db.commit()
-    
-    for kw in created:
-        db.refresh(kw)
     
-    return created
+    return await insert_keywords(
+        db,
+        user_id=current_user.id,
+        keywords=PRESET_KEYWORDS[industry],
+        platform=platform,
+        results_per_run=10
+    )
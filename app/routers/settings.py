@@ -1,31 +1,35 @@
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from fastapi.responses import ORJSONResponse
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.database import get_db
 from app.models import User, UserSettings
 from app.schemas import UserSettingsUpdate, UserSettingsResponse, GoogleSheetConnect
 from app.auth import get_current_user
+from app.cache import invalidate_user
 from app.services import sheets_service
 
-router = APIRouter(prefix="/api/settings", tags=["Settings"])
+router = APIRouter(prefix="/api/settings", tags=["Settings"], default_response_class=ORJSONResponse)
 
 
 @router.get("/", response_model=UserSettingsResponse)
 async def get_settings(
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
     """Get current user settings"""
-    settings = db.query(UserSettings).filter(
-        UserSettings.user_id == current_user.id
-    ).first()
+    settings = (await db.scalars(
+        select(UserSettings).where(UserSettings.user_id == current_user.id)
+    )).first()
     
     if not settings:
         # Create default settings
         settings = UserSettings(user_id=current_user.id)
         db.add(settings)
-        db.commit()
-        db.refresh(settings)
+        await db.commit()
+        await db.refresh(settings)
     
     return settings
 
@@ -33,13 +37,13 @@ async def get_settings(
 @router.put("/", response_model=UserSettingsResponse)
 async def update_settings(
     settings_data: UserSettingsUpdate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
     """Update user settings"""
-    settings = db.query(UserSettings).filter(
-        UserSettings.user_id == current_user.id
-    ).first()
+    settings = (await db.scalars(
+        select(UserSettings).where(UserSettings.user_id == current_user.id)
+    )).first()
     
     if not settings:
         settings = UserSettings(user_id=current_user.id)
@@ -50,8 +54,8 @@ async def update_settings(
     for field, value in update_data.items():
         setattr(settings, field, value)
     
-    db.commit()
-    db.refresh(settings)
+    await db.commit()
+    await db.refresh(settings)
     
     return settings
 
@@ -59,12 +63,12 @@ async def update_settings(
 @router.post("/connect-sheet")
 async def connect_google_sheet(
     sheet_data: GoogleSheetConnect,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
     """Connect a Google Sheet to user account"""
-    # Verify we can access the sheet
-    result = sheets_service.verify_sheet_access(sheet_data.sheet_id)
+    # Verify we can access the sheet (gspread is blocking; keep it off the event loop)
+    result = await run_in_threadpool(sheets_service.verify_sheet_access, sheet_data.sheet_id)
     
     if not result["success"]:
         raise HTTPException(
@@ -73,11 +77,18 @@ async def connect_google_sheet(
         )
     
     # Setup sheet structure
-    setup_result = sheets_service.setup_sheet_for_user(sheet_data.sheet_id)
+    setup_result = await run_in_threadpool(
+        sheets_service.setup_sheet_for_user, sheet_data.sheet_id
+    )
     
-    # Save sheet ID to user
-    current_user.google_sheet_id = sheet_data.sheet_id
-    db.commit()
+    # Save sheet ID to user (current_user may be a cached snapshot)
+    await db.execute(
+        update(User).where(User.id == current_user.id).values(
+            google_sheet_id=sheet_data.sheet_id
+        )
+    )
+    await db.commit()
+    await invalidate_user(current_user.id)
     
     return {
         "message": "Google Sheet connected successfully",
@@ -88,19 +99,22 @@ async def connect_google_sheet(
 
 @router.delete("/disconnect-sheet")
 async def disconnect_google_sheet(
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
     """Disconnect Google Sheet from user account"""
-    current_user.google_sheet_id = None
-    db.commit()
+    await db.execute(
+        update(User).where(User.id == current_user.id).values(google_sheet_id=None)
+    )
+    await db.commit()
+    await invalidate_user(current_user.id)
     
     return {"message": "Google Sheet disconnected"}
 
 
 @router.get("/sheet-status")
 async def get_sheet_status(
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
     """Get connected Google Sheet status"""
@@ -112,7 +126,9 @@ async def get_sheet_status(
         }
     
     # Verify sheet is still accessible
-    result = sheets_service.verify_sheet_access(current_user.google_sheet_id)
+    result = await run_in_threadpool(
+        sheets_service.verify_sheet_access, current_user.google_sheet_id
+    )
     
     return {
         "connected": result["success"],
@@ -1,17 +1,149 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
-from sqlalchemy.orm import Session
-from typing import List, Optional
-from datetime import datetime, timedelta
+from fastapi import APIRouter, Depends, HTTPException, Response, status, Query
+from fastapi.responses import ORJSONResponse, StreamingResponse
+from fastapi_cache.decorator import cache
+from sqlalchemy import Integer, String, cast, select, func
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.sql import Select
+from typing import AsyncIterator, List, Optional, Union
+from pydantic import TypeAdapter
+import orjson
 
-from app.database import get_db
+from app.database import get_db, AsyncSessionLocal
 from app.models import User, Video, Keyword, PlatformEnum
-from app.schemas import VideoResponse, VideoWithKeyword
+from app.schemas import (
+    VideoResponse, VideoResponseList, VideoResponseLite, VideoResponseLiteList
+)
 from app.auth import get_current_user
+from app.cache import (
+    VIDEOS_NAMESPACE, conditional_get, no_browser_cache, no_db_key_builder, invalidate_user_responses
+)
 
-router = APIRouter(prefix="/api/videos", tags=["Videos"])
+router = APIRouter(prefix="/api/videos", tags=["Videos"], default_response_class=ORJSONResponse)
+
+
+def _platform_value(platform_column):
+    """Platform as its API value; enums are stored by member name"""
+    return func.lower(cast(platform_column, String))
+
+
+def _scraped_since(days: int):
+    """Window start computed by Postgres, so the statement text never changes"""
+    return func.now() - func.make_interval(0, 0, 0, days)  # years, months, weeks, days
+
+
+def _int_or_zero(aggregate):
+    """Truncate an aggregate (e.g. AVG) to an integer, 0 when there are no rows"""
+    return func.coalesce(cast(func.trunc(aggregate), Integer), 0)
+
+
+def _sum_or_zero(column):
+    """SUM of an integer column, 0 when there are no rows (stays bigint; totals can pass int4)"""
+    return func.coalesce(func.sum(column), 0)
+
+
+# Columns VideoResponse needs; selecting these returns plain rows instead of
+# fully instrumented ORM instances
+VIDEO_RESPONSE_COLUMNS = (
+    Video.id,
+    Video.platform,
+    Video.video_url,
+    Video.video_id,
+    Video.author_username,
+    Video.author_name,
+    Video.description,
+    Video.likes,
+    Video.comments,
+    Video.shares,
+    Video.views,
+    Video.transcription,
+    Video.transcription_status,
+    Video.posted_at,
+    Video.scraped_at,
+)
+
+# Same minus the transcription blob, for VideoResponseLite
+VIDEO_LITE_COLUMNS = tuple(c for c in VIDEO_RESPONSE_COLUMNS if c.key != "transcription")
+
+# Rows buffered per fetch when streaming NDJSON
+STREAM_BATCH_SIZE = 50
+
+
+async def _ndjson_rows(query: Select) -> AsyncIterator[bytes]:
+    """
+    Stream query rows as NDJSON over a server-side cursor
+    
+    Opens its own session: request-scoped dependencies are closed before
+    a StreamingResponse body is sent.
+    """
+    async with AsyncSessionLocal() as db:
+        result = await db.stream(query.execution_options(yield_per=STREAM_BATCH_SIZE))
+        async for partition in result.partitions():
+            for row in partition:
+                yield orjson.dumps(row._asdict()) + b"\n"
+
+
+def _video_list_response(rows, adapter: TypeAdapter = VideoResponseList) -> Response:
+    """
+    Validate and serialize rows in single pydantic-core calls
+    
+    Responses cached by @cache stay plain rows, since the cache coder
+    can't store a Response.
+    """
+    videos = adapter.validate_python(rows, from_attributes=True)
+    return Response(content=adapter.dump_json(videos), media_type="application/json")
+
+
+def _videos_query(
+    user_id: int,
+    platform: Optional[PlatformEnum],
+    keyword_id: Optional[int],
+    transcription_status: Optional[str],
+    days: int
+) -> Select:
+    # Optional filters are added only when given: platform/keyword_id must
+    # appear as real predicates for the planner to use the compound indexes
+    # (a generic plan can't for "param IS NULL OR column = param"). Limit
+    # and offset stay bound by the caller, so there are only a few shapes.
+    query = select(*VIDEO_RESPONSE_COLUMNS).where(
+        Video.user_id == user_id,
+        Video.scraped_at >= _scraped_since(days)  # Filter by date
+    )
+    
+    if platform is not None:
+        query = query.where(Video.platform == platform)
+    if keyword_id is not None:
+        query = query.where(Video.keyword_id == keyword_id)
+    if transcription_status is not None:
+        query = query.where(Video.transcription_status == transcription_status)
+    
+    return query.order_by(Video.likes.desc())  # Order by engagement (likes)
+
+
+def _search_query(
+    user_id: int,
+    q: str,
+    search_transcripts: bool,
+    include_transcription: bool
+) -> Select:
+    columns = VIDEO_RESPONSE_COLUMNS if include_transcription else VIDEO_LITE_COLUMNS
+    query = select(*columns).where(Video.user_id == user_id)
+    
+    search_term = f"%{q}%"
+    
+    if search_transcripts:
+        query = query.where(
+            (Video.description.ilike(search_term)) |
+            (Video.transcription.ilike(search_term))
+        )
+    else:
+        query = query.where(Video.description.ilike(search_term))
+    
+    return query.order_by(Video.likes.desc())
 
 
 @router.get("/", response_model=List[VideoResponse])
+@no_browser_cache
+@cache(expire=30, namespace=VIDEOS_NAMESPACE, key_builder=no_db_key_builder)
 async def get_videos(
     platform: Optional[PlatformEnum] = None,
     keyword_id: Optional[int] = None,
@@ -19,140 +151,158 @@ async def get_videos(
     days: int = Query(default=7, ge=1, le=90),
     limit: int = Query(default=50, ge=1, le=200),
     offset: int = Query(default=0, ge=0),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
     """Get videos with optional filters"""
-    query = db.query(Video).filter(Video.user_id == current_user.id)
-    
-    if platform:
-        query = query.filter(Video.platform == platform)
-    
-    if keyword_id:
-        query = query.filter(Video.keyword_id == keyword_id)
-    
-    if transcription_status:
-        query = query.filter(Video.transcription_status == transcription_status)
-    
-    # Filter by date
-    since = datetime.utcnow() - timedelta(days=days)
-    query = query.filter(Video.scraped_at >= since)
-    
-    # Order by engagement (likes)
-    query = query.order_by(Video.likes.desc())
-    
-    return query.offset(offset).limit(limit).all()
+    query = _videos_query(current_user.id, platform, keyword_id, transcription_status, days)
+    return (await db.execute(query.offset(offset).limit(limit))).all()
+
+
+@router.get("/stream")
+async def stream_videos(
+    platform: Optional[PlatformEnum] = None,
+    keyword_id: Optional[int] = None,
+    transcription_status: Optional[str] = None,
+    days: int = Query(default=7, ge=1, le=90),
+    limit: int = Query(default=50, ge=1, le=200),
+    offset: int = Query(default=0, ge=0),
+    current_user: User = Depends(get_current_user)
+):
+    """Same as GET /api/videos, streamed as NDJSON (one VideoResponse per line)"""
+    query = _videos_query(current_user.id, platform, keyword_id, transcription_status, days)
+    return StreamingResponse(
+        _ndjson_rows(query.offset(offset).limit(limit)),
+        media_type="application/x-ndjson"
+    )
 
 
 @router.get("/recent", response_model=List[VideoResponse])
+@conditional_get
+@cache(expire=30, namespace=VIDEOS_NAMESPACE, key_builder=no_db_key_builder)
 async def get_recent_videos(
     limit: int = Query(default=20, ge=1, le=100),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
     """Get most recently scraped videos"""
-    return db.query(Video).filter(
-        Video.user_id == current_user.id
-    ).order_by(Video.scraped_at.desc()).limit(limit).all()
+    return (await db.execute(
+        select(*VIDEO_RESPONSE_COLUMNS).where(
+            Video.user_id == current_user.id
+        ).order_by(Video.scraped_at.desc()).limit(limit)
+    )).all()
 
 
 @router.get("/top", response_model=List[VideoResponse])
+@conditional_get
+@cache(expire=30, namespace=VIDEOS_NAMESPACE, key_builder=no_db_key_builder)
 async def get_top_videos(
     platform: Optional[PlatformEnum] = None,
     days: int = Query(default=7, ge=1, le=30),
     limit: int = Query(default=10, ge=1, le=50),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
     """Get top performing videos by engagement"""
-    since = datetime.utcnow() - timedelta(days=days)
-    
-    query = db.query(Video).filter(
+    query = select(*VIDEO_RESPONSE_COLUMNS).where(
         Video.user_id == current_user.id,
-        Video.scraped_at >= since
+        Video.scraped_at >= _scraped_since(days)
     )
     
     if platform:
-        query = query.filter(Video.platform == platform)
+        query = query.where(Video.platform == platform)
     
-    return query.order_by(Video.likes.desc()).limit(limit).all()
+    return (await db.execute(query.order_by(Video.likes.desc()).limit(limit))).all()
 
 
 @router.get("/by-keyword/{keyword_id}", response_model=List[VideoResponse])
 async def get_videos_by_keyword(
     keyword_id: int,
     limit: int = Query(default=50, ge=1, le=200),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
     """Get all videos for a specific keyword"""
     # Verify keyword belongs to user
-    keyword = db.query(Keyword).filter(
-        Keyword.id == keyword_id,
-        Keyword.user_id == current_user.id
-    ).first()
+    keyword_exists = await db.scalar(
+        select(1).where(
+            Keyword.id == keyword_id,
+            Keyword.user_id == current_user.id
+        ).limit(1)
+    )
     
-    if not keyword:
+    if not keyword_exists:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Keyword not found"
         )
     
-    return db.query(Video).filter(
-        Video.keyword_id == keyword_id
-    ).order_by(Video.likes.desc()).limit(limit).all()
+    return _video_list_response((await db.execute(
+        select(*VIDEO_RESPONSE_COLUMNS).where(
+            Video.user_id == current_user.id,  # Lets ix_videos_user_keyword_likes serve this
+            Video.keyword_id == keyword_id
+        ).order_by(Video.likes.desc()).limit(limit)
+    )).all())
 
 
 @router.get("/pending-transcription", response_model=List[VideoResponse])
 async def get_pending_transcriptions(
     limit: int = Query(default=50, ge=1, le=200),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
     """Get videos pending transcription"""
-    return db.query(Video).filter(
-        Video.user_id == current_user.id,
-        Video.transcription_status == "pending"
-    ).order_by(Video.scraped_at.desc()).limit(limit).all()
+    return _video_list_response((await db.execute(
+        select(*VIDEO_RESPONSE_COLUMNS).where(
+            Video.user_id == current_user.id,
+            Video.transcription_status == "pending"
+        ).order_by(Video.scraped_at.desc()).limit(limit)
+    )).all())
 
 
-@router.get("/search", response_model=List[VideoResponse])
+@router.get("/search", response_model=Union[List[VideoResponseLite], List[VideoResponse]])
 async def search_videos(
     q: str = Query(..., min_length=2),
     search_transcripts: bool = True,
+    include_transcription: bool = False,
     limit: int = Query(default=50, ge=1, le=200),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
-    """Search videos by description or transcription"""
-    query = db.query(Video).filter(Video.user_id == current_user.id)
-    
-    search_term = f"%{q}%"
-    
-    if search_transcripts:
-        query = query.filter(
-            (Video.description.ilike(search_term)) |
-            (Video.transcription.ilike(search_term))
-        )
-    else:
-        query = query.filter(Video.description.ilike(search_term))
-    
-    return query.order_by(Video.likes.desc()).limit(limit).all()
+    """Search videos by description or transcription (transcripts returned on request)"""
+    query = _search_query(current_user.id, q, search_transcripts, include_transcription)
+    return _video_list_response(
+        (await db.execute(query.limit(limit))).all(),
+        VideoResponseList if include_transcription else VideoResponseLiteList
+    )
+
+
+@router.get("/search/stream")
+async def stream_search_videos(
+    q: str = Query(..., min_length=2),
+    search_transcripts: bool = True,
+    include_transcription: bool = False,
+    limit: int = Query(default=50, ge=1, le=200),
+    current_user: User = Depends(get_current_user)
+):
+    """Same as GET /api/videos/search, streamed as NDJSON"""
+    query = _search_query(current_user.id, q, search_transcripts, include_transcription)
+    return StreamingResponse(
+        _ndjson_rows(query.limit(limit)),
+        media_type="application/x-ndjson"
+    )
 
 
 @router.get("/{video_id}", response_model=VideoResponse)
 async def get_video(
     video_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
     """Get a specific video"""
-    video = db.query(Video).filter(
-        Video.id == video_id,
-        Video.user_id == current_user.id
-    ).first()
+    video = await db.get(Video, video_id)
     
-    if not video:
+    if video is None or video.user_id != current_user.id:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Video not found"
@@ -164,96 +314,75 @@ async def get_video(
 @router.delete("/{video_id}")
 async def delete_video(
     video_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
     """Delete a video"""
-    video = db.query(Video).filter(
-        Video.id == video_id,
-        Video.user_id == current_user.id
-    ).first()
+    video = await db.get(Video, video_id)
     
-    if not video:
+    if video is None or video.user_id != current_user.id:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Video not found"
         )
     
-    db.delete(video)
-    db.commit()
+    await db.delete(video)
+    await db.commit()
+    await invalidate_user_responses(current_user.id)
     
     return {"message": "Video deleted"}
 
 
 @router.get("/stats/by-platform")
+@conditional_get
+@cache(expire=30, namespace=VIDEOS_NAMESPACE, key_builder=no_db_key_builder)
 async def get_stats_by_platform(
     days: int = Query(default=7, ge=1, le=30),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
     """Get video statistics grouped by platform"""
-    from sqlalchemy import func
-    
-    since = datetime.utcnow() - timedelta(days=days)
-    
-    stats = db.query(
-        Video.platform,
-        func.count(Video.id).label("total_videos"),
-        func.sum(Video.likes).label("total_likes"),
-        func.avg(Video.likes).label("avg_likes"),
-        func.sum(Video.views).label("total_views")
-    ).filter(
-        Video.user_id == current_user.id,
-        Video.scraped_at >= since
-    ).group_by(Video.platform).all()
-    
-    return [
-        {
-            "platform": stat.platform.value,
-            "total_videos": stat.total_videos,
-            "total_likes": int(stat.total_likes or 0),
-            "avg_likes": int(stat.avg_likes or 0),
-            "total_views": int(stat.total_views or 0)
-        }
-        for stat in stats
-    ]
+    # Rows come back ready to serialize; no per-row Python conversion
+    return (await db.execute(
+        select(
+            _platform_value(Video.platform).label("platform"),
+            func.count(Video.id).label("total_videos"),
+            _sum_or_zero(Video.likes).label("total_likes"),
+            _int_or_zero(func.avg(Video.likes)).label("avg_likes"),
+            _sum_or_zero(Video.views).label("total_views")
+        ).where(
+            Video.user_id == current_user.id,
+            Video.scraped_at >= _scraped_since(days)
+        ).group_by(Video.platform)
+    )).mappings().all()
 
 
 @router.get("/stats/by-keyword")
+@conditional_get
+@cache(expire=30, namespace=VIDEOS_NAMESPACE, key_builder=no_db_key_builder)
 async def get_stats_by_keyword(
     platform: Optional[PlatformEnum] = None,
     days: int = Query(default=7, ge=1, le=30),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
     """Get video statistics grouped by keyword"""
-    from sqlalchemy import func
-    
-    since = datetime.utcnow() - timedelta(days=days)
-    
-    query = db.query(
+    query = select(
         Keyword.keyword,
-        Keyword.platform,
+        _platform_value(Keyword.platform).label("platform"),
         func.count(Video.id).label("total_videos"),
-        func.sum(Video.likes).label("total_likes"),
-        func.avg(Video.likes).label("avg_likes")
-    ).join(Video).filter(
+        _sum_or_zero(Video.likes).label("total_likes"),
+        _int_or_zero(func.avg(Video.likes)).label("avg_likes")
+    ).join(Video).where(
         Keyword.user_id == current_user.id,
-        Video.scraped_at >= since
+        Video.scraped_at >= _scraped_since(days)
     )
     
     if platform:
-        query = query.filter(Keyword.platform == platform)
-    
-    stats = query.group_by(Keyword.id).order_by(func.sum(Video.likes).desc()).all()
+        query = query.where(Keyword.platform == platform)
     
-    return [
-        {
-            "keyword": stat.keyword,
-            "platform": stat.platform.value,
-            "total_videos": stat.total_videos,
-            "total_likes": int(stat.total_likes or 0),
-            "avg_likes": int(stat.avg_likes or 0)
-        }
-        for stat in stats
-    ]
+    return (await db.execute(
+        query.group_by(
+            Keyword.id, Keyword.keyword, Keyword.platform
+        ).order_by(func.sum(Video.likes).desc())
+    )).mappings().all()
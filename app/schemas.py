@@ -1,4 +1,4 @@
-from pydantic import BaseModel, EmailStr
+from pydantic import BaseModel, ConfigDict, EmailStr, TypeAdapter
 from typing import Optional, List
 from datetime import datetime
 from app.models import PlatformEnum, JobStatusEnum
@@ -26,8 +26,7 @@ class UserResponse(BaseModel):
     google_sheet_id: Optional[str]
     created_at: datetime
 
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 
 class Token(BaseModel):
@@ -62,8 +61,10 @@ class KeywordResponse(BaseModel):
     results_per_run: int
     created_at: datetime
 
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
+
+
+KeywordResponseList = TypeAdapter(List[KeywordResponse])
 
 
 class KeywordBulkCreate(BaseModel):
@@ -74,7 +75,8 @@ class KeywordBulkCreate(BaseModel):
 
 # ============ Video Schemas ============
 
-class VideoResponse(BaseModel):
+class VideoResponseLite(BaseModel):
+    """Video without its transcription text"""
     id: int
     platform: PlatformEnum
     video_url: str
@@ -86,13 +88,19 @@ class VideoResponse(BaseModel):
     comments: int
     shares: int
     views: int
-    transcription: Optional[str]
     transcription_status: str
     posted_at: Optional[datetime]
     scraped_at: datetime
 
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
+
+
+class VideoResponse(VideoResponseLite):
+    transcription: Optional[str]
+
+
+VideoResponseList = TypeAdapter(List[VideoResponse])
+VideoResponseLiteList = TypeAdapter(List[VideoResponseLite])
 
 
 class VideoWithKeyword(VideoResponse):
@@ -113,8 +121,11 @@ class JobResponse(BaseModel):
     completed_at: Optional[datetime]
     created_at: datetime
 
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
+
+
+# Built once so list responses validate in a single pydantic-core call
+JobResponseList = TypeAdapter(List[JobResponse])
 
 
 class JobCreate(BaseModel):
@@ -142,8 +153,7 @@ class UserSettingsResponse(BaseModel):
     date_filter: str
     email_notifications: bool
 
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 
 class GoogleSheetConnect(BaseModel):
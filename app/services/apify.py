@@ -1,18 +1,112 @@
-from apify_client import ApifyClient
-from typing import List, Dict, Optional
-from datetime import datetime, timedelta
+from apify_client import ApifyClientAsync
+from typing import List, Dict, Tuple
+from datetime import datetime, timezone
 from app.config import settings
 from app.models import PlatformEnum
+import heapq
+import httpx
 import logging
+import orjson
+import re
+import time
+from operator import itemgetter
 
 logger = logging.getLogger(__name__)
 
+_by_likes = itemgetter("likes")
+
+APIFY_API_URL = "https://api.apify.com/v2"
+
+# Scrape window per date filter; unknown filters default to this week
+DATE_FILTER_DAYS = {"today": 1, "this_week": 7, "this_month": 30}
+
+
+def _cutoff_epoch(date_filter: str) -> int:
+    """Oldest accepted post time as a Unix epoch"""
+    return int(time.time()) - DATE_FILTER_DAYS.get(date_filter, 7) * 86400
+
+
+def _query_key(query: str) -> str:
+    """Match key for a search query; the actor may echo it back re-cased or re-spaced"""
+    return " ".join(query.split()).casefold()  # Also strips the ends
+
+
+def _search_queries(keywords: List[str]) -> Dict[str, str]:
+    """One search query per match key; keywords differing only in case or spacing share it"""
+    queries = {}
+    for keyword in keywords:
+        queries.setdefault(_query_key(keyword), keyword)
+    return queries
+
+
+def _split_by_query(keywords: List[str], items: List[Dict]) -> Tuple[Dict[str, List[Dict]], int]:
+    """
+    Hand dataset items back to the keywords whose search query found them
+    
+    Keywords sharing a query all get its items. Items matching no query go
+    to the only query when there is one; otherwise they are counted and
+    returned as the unmatched total.
+    """
+    items_by_query = {key: [] for key in _search_queries(keywords)}
+    unmatched = 0
+    for item in items:
+        query_items = items_by_query.get(_query_key(item.get("searchQuery") or ""))
+        if query_items is None:
+            if len(items_by_query) != 1:
+                unmatched += 1
+                continue
+            query_items = next(iter(items_by_query.values()))
+        query_items.append(item)
+    
+    return {keyword: items_by_query[_query_key(keyword)] for keyword in keywords}, unmatched
+
+
+def _tiktok_video(item: Dict) -> Dict:
+    """Video data dict for a TikTok dataset item"""
+    author = item.get("authorMeta", {})
+    create_time = item.get("createTime")
+    return {
+        "platform": PlatformEnum.TIKTOK,
+        "video_url": item.get("webVideoUrl") or f"https://www.tiktok.com/@{author.get('name')}/video/{item.get('id')}",
+        "video_id": item.get("id"),
+        "author_username": author.get("name"),
+        "author_name": author.get("nickName"),
+        "description": item.get("text"),
+        "likes": item.get("diggCount", 0),
+        "comments": item.get("commentCount", 0),
+        "shares": item.get("shareCount", 0),
+        "views": item.get("playCount", 0),
+        "posted_at": datetime.fromtimestamp(create_time, tz=timezone.utc) if create_time else None,
+    }
+
+
+# Anything a hashtag can't contain (spaces, punctuation)
+_HASHTAG_STRIP_RE = re.compile(r"\W+")
+
+# Dataset fields each scraper reads; the API returns nothing else
+TIKTOK_ITEM_FIELDS = [
+    "id", "webVideoUrl", "authorMeta", "text", "diggCount",
+    "commentCount", "shareCount", "playCount", "createTime", "searchQuery",
+]
+INSTAGRAM_ITEM_FIELDS = [
+    "id", "type", "url", "videoUrl", "ownerUsername", "ownerFullName",
+    "caption", "likesCount", "commentsCount", "videoViewCount", "timestamp",
+]
+
 
 class ApifyService:
     """Service for scraping TikTok and Instagram using Apify actors"""
     
     def __init__(self):
-        self.client = ApifyClient(settings.apify_api_token)
+        # Async client: actor runs and dataset reads never block the event loop
+        self.client = ApifyClientAsync(settings.apify_api_token)
+        
+        # Dataset items are read directly so the body is parsed with orjson
+        self.http = httpx.AsyncClient(
+            base_url=APIFY_API_URL,
+            headers={"Authorization": f"Bearer {settings.apify_api_token}"},
+            timeout=60.0
+        )
         
         # Apify actor IDs (these are popular, maintained actors)
         self.actors = {
@@ -22,15 +116,16 @@ class ApifyService:
     
     def _get_date_filter(self, date_filter: str) -> datetime:
         """Convert date filter string to datetime"""
-        now = datetime.utcnow()
-        if date_filter == "today":
-            return now - timedelta(days=1)
-        elif date_filter == "this_week":
-            return now - timedelta(days=7)
-        elif date_filter == "this_month":
-            return now - timedelta(days=30)
-        else:
-            return now - timedelta(days=7)  # Default to this week
+        return datetime.fromtimestamp(_cutoff_epoch(date_filter), tz=timezone.utc)
+    
+    async def _dataset_items(self, dataset_id: str, fields: List[str]) -> List[Dict]:
+        """Fetch a run's dataset items (only the given fields) in one request"""
+        response = await self.http.get(
+            f"/datasets/{dataset_id}/items",
+            params={"format": "json", "clean": "true", "fields": ",".join(fields)}
+        )
+        response.raise_for_status()
+        return orjson.loads(response.content)
     
     async def scrape_tiktok(
         self,
@@ -44,50 +139,69 @@ class ApifyService:
         
         Returns list of video data dictionaries
         """
+        results = await self.scrape_tiktok_batch([keyword], max_results, min_likes, date_filter)
+        return results[keyword]
+    
+    async def scrape_tiktok_batch(
+        self,
+        keywords: List[str],
+        max_results: int = 10,
+        min_likes: int = 1000,
+        date_filter: str = "this_week"
+    ) -> Dict[str, List[Dict]]:
+        """
+        Scrape several TikTok keywords in one actor run
+        
+        Returns the top max_results videos for each keyword, keyed by keyword
+        """
         try:
             run_input = {
-                "searchQueries": [keyword],
-                "resultsPerPage": max_results * 2,  # Get extra to filter
+                # Keywords that differ only in case/spacing search once
+                "searchQueries": list(_search_queries(keywords).values()),
+                "resultsPerPage": max_results,
+                "sortType": "likes",  # Most-liked first, so the page holds the top videos
                 "searchSection": "video",
                 "maxProfilesPerQuery": 0,
                 "shouldDownloadVideos": False,
                 "shouldDownloadCovers": False,
+                # Let the actor drop videos older than the window
+                "oldestPostDateUnified": self._get_date_filter(date_filter).strftime("%Y-%m-%d"),
             }
             
-            logger.info(f"Starting TikTok scrape for keyword: {keyword}")
+            logger.info(f"Starting TikTok scrape for keywords: {keywords}")
             
             # Run the actor
-            run = self.client.actor(self.actors[PlatformEnum.TIKTOK]).call(run_input=run_input)
+            run = await self.client.actor(self.actors[PlatformEnum.TIKTOK]).call(run_input=run_input)
             
-            # Get results from dataset
-            videos = []
-            for item in self.client.dataset(run["defaultDatasetId"]).iterate_items():
-                # Filter by minimum likes
-                if item.get("diggCount", 0) >= min_likes:
-                    video_data = {
-                        "platform": PlatformEnum.TIKTOK,
-                        "video_url": item.get("webVideoUrl") or f"https://www.tiktok.com/@{item.get('authorMeta', {}).get('name')}/video/{item.get('id')}",
-                        "video_id": item.get("id"),
-                        "author_username": item.get("authorMeta", {}).get("name"),
-                        "author_name": item.get("authorMeta", {}).get("nickName"),
-                        "description": item.get("text"),
-                        "likes": item.get("diggCount", 0),
-                        "comments": item.get("commentCount", 0),
-                        "shares": item.get("shareCount", 0),
-                        "views": item.get("playCount", 0),
-                        "posted_at": datetime.fromtimestamp(item.get("createTime", 0)) if item.get("createTime") else None,
-                    }
-                    videos.append(video_data)
+            # Get results from dataset, split back out by the query that found them
+            items_by_keyword, unmatched = _split_by_query(
+                keywords, await self._dataset_items(run["defaultDatasetId"], TIKTOK_ITEM_FIELDS)
+            )
+            if unmatched:
+                logger.warning(
+                    f"Dropped {unmatched} TikTok items whose searchQuery matched none of {keywords}"
+                )
             
-            # Sort by likes and take top results
-            videos.sort(key=lambda x: x["likes"], reverse=True)
-            videos = videos[:max_results]
+            # The actor's date input is day-granular, so check age to the second
+            cutoff = _cutoff_epoch(date_filter)
             
-            logger.info(f"TikTok scrape complete. Found {len(videos)} videos for '{keyword}'")
-            return videos
+            videos_by_keyword = {}
+            for keyword, items in items_by_keyword.items():
+                # The actor has no minimum-likes input
+                videos = (
+                    _tiktok_video(item) for item in items
+                    if item.get("diggCount", 0) >= min_likes
+                    and (not item.get("createTime") or item["createTime"] >= cutoff)
+                )
+                # Take top results by likes (partial sort; we keep only a few)
+                videos_by_keyword[keyword] = heapq.nlargest(max_results, videos, key=_by_likes)
+                logger.info(
+                    f"TikTok scrape complete. Found {len(videos_by_keyword[keyword])} videos for '{keyword}'"
+                )
+            return videos_by_keyword
             
         except Exception as e:
-            logger.error(f"TikTok scrape failed for '{keyword}': {str(e)}")
+            logger.error(f"TikTok scrape failed for {keywords}: {str(e)}")
             raise
     
     async def scrape_instagram(
@@ -104,29 +218,32 @@ class ApifyService:
         """
         try:
             # Convert keyword to hashtag format
-            hashtag = keyword.replace(" ", "").lower()
+            hashtag = _HASHTAG_STRIP_RE.sub("", keyword).lower()
             
             run_input = {
                 "hashtags": [hashtag],
                 "resultsLimit": max_results * 2,
                 "resultsType": "posts",
                 "searchType": "hashtag",
+                # Let the actor drop posts older than the window
+                "onlyPostsNewerThan": self._get_date_filter(date_filter).strftime("%Y-%m-%d"),
             }
             
             logger.info(f"Starting Instagram scrape for hashtag: #{hashtag}")
             
             # Run the actor
-            run = self.client.actor(self.actors[PlatformEnum.INSTAGRAM]).call(run_input=run_input)
+            run = await self.client.actor(self.actors[PlatformEnum.INSTAGRAM]).call(run_input=run_input)
             
             # Get results from dataset
             videos = []
-            for item in self.client.dataset(run["defaultDatasetId"]).iterate_items():
+            for item in await self._dataset_items(run["defaultDatasetId"], INSTAGRAM_ITEM_FIELDS):
                 # Only get video posts (reels)
                 if item.get("type") != "Video" and item.get("videoUrl") is None:
                     continue
                     
                 # Filter by minimum likes
-                if item.get("likesCount", 0) >= min_likes:
+                likes = item.get("likesCount", 0)
+                if likes >= min_likes:
                     video_data = {
                         "platform": PlatformEnum.INSTAGRAM,
                         "video_url": item.get("url") or item.get("videoUrl"),
@@ -134,7 +251,7 @@ class ApifyService:
                         "author_username": item.get("ownerUsername"),
                         "author_name": item.get("ownerFullName"),
                         "description": item.get("caption"),
-                        "likes": item.get("likesCount", 0),
+                        "likes": likes,
                         "comments": item.get("commentsCount", 0),
                         "shares": 0,  # Instagram doesn't expose share count
                         "views": item.get("videoViewCount", 0),
@@ -142,9 +259,8 @@ class ApifyService:
                     }
                     videos.append(video_data)
             
-            # Sort by likes and take top results
-            videos.sort(key=lambda x: x["likes"], reverse=True)
-            videos = videos[:max_results]
+            # Take top results by likes (partial sort; we keep only a few)
+            videos = heapq.nlargest(max_results, videos, key=_by_likes)
             
             logger.info(f"Instagram scrape complete. Found {len(videos)} videos for '#{hashtag}'")
             return videos
@@ -1,10 +1,15 @@
 import gspread
 from google.oauth2.service_account import Credentials
-from typing import List, Dict, Optional
-from datetime import datetime
+from typing import List, Dict, Optional, Tuple
+from collections import defaultdict
+from datetime import datetime, timezone
 from app.config import settings
 from app.models import PlatformEnum, Video
 import logging
+import re
+import time
+from operator import itemgetter
+from requests.adapters import HTTPAdapter
 
 logger = logging.getLogger(__name__)
 
@@ -14,12 +19,56 @@ SCOPES = [
     'https://www.googleapis.com/auth/drive'
 ]
 
+# Scraper video dicts always carry these keys (see ApifyService)
+_batch_row_fields = itemgetter(
+    "video_url", "author_username", "description", "likes", "comments", "shares", "views"
+)
+
+
+def _trim_description(description: str) -> str:
+    return description[:200] + "..." if len(description) > 200 else description
+
+
+# How long opened spreadsheet/worksheet handles are reused
+SHEET_HANDLE_TTL_SECONDS = 300
+
+# Worksheet holding each platform's videos (tab names are case-sensitive)
+_PLATFORM_WS = {
+    PlatformEnum.TIKTOK: "TikTok",
+    PlatformEnum.INSTAGRAM: "Instagram",
+}
+
+# How long a worksheet's URL -> row index is trusted; rows move when users
+# sort, filter or delete in the sheet
+URL_INDEX_TTL_SECONDS = 60
+
+# Column holding each row's video URL (C)
+VIDEO_URL_COLUMN = 3
+
+# Rows per values.append request; keeps large backfills under the request size limit
+APPEND_CHUNK_ROWS = 100
+
+# Retries for rate-limited appends, backing off 1s, 2s, 4s... up to 30s. Only
+# 429 is retried: Sheets rejected that request, whereas a 5xx append may
+# still have landed and retrying it would duplicate rows
+APPEND_MAX_ATTEMPTS = 5
+APPEND_MAX_BACKOFF_SECONDS = 30
+RATE_LIMITED_STATUS_CODE = 429
+
+# First row of an append response's range, e.g. "'TikTok'!A12:K21" -> 12
+_UPDATED_RANGE_START_RE = re.compile(r"![A-Z]+(\d+)")
+
 
 class GoogleSheetsService:
     """Service for reading/writing to Google Sheets"""
     
     def __init__(self):
         self.client = None
+        # (sheet_id, worksheet_name) -> (read time, {video_url: row number})
+        self._url_row_cache: Dict[Tuple[str, str], Tuple[float, Dict[str, int]]] = {}
+        # Opened handles with their open time, so each call skips the metadata fetch
+        self._spreadsheet_cache: Dict[str, Tuple[float, gspread.Spreadsheet]] = {}
+        self._worksheet_cache: Dict[Tuple[str, str], Tuple[float, gspread.Worksheet]] = {}
         self._init_client()
     
     def _init_client(self):
@@ -30,11 +79,44 @@ class GoogleSheetsService:
                 scopes=SCOPES
             )
             self.client = gspread.authorize(creds)
+            # Keep more pooled connections for concurrent threadpool calls
+            self.client.http_client.session.mount(
+                "https://", HTTPAdapter(pool_connections=10, pool_maxsize=20)
+            )
             logger.info("Google Sheets client initialized")
         except Exception as e:
             logger.error(f"Failed to initialize Google Sheets client: {str(e)}")
             self.client = None
     
+    def _spreadsheet(self, sheet_id: str) -> gspread.Spreadsheet:
+        """Open a spreadsheet, reusing a recent handle"""
+        cached = self._spreadsheet_cache.get(sheet_id)
+        if cached and time.monotonic() - cached[0] < SHEET_HANDLE_TTL_SECONDS:
+            return cached[1]
+        
+        spreadsheet = self.client.open_by_key(sheet_id)
+        self._spreadsheet_cache[sheet_id] = (time.monotonic(), spreadsheet)
+        return spreadsheet
+    
+    def _ws(self, sheet_id: str, worksheet_name: str) -> gspread.Worksheet:
+        """Get a worksheet, reusing a recent handle"""
+        key = (sheet_id, worksheet_name)
+        cached = self._worksheet_cache.get(key)
+        if cached and time.monotonic() - cached[0] < SHEET_HANDLE_TTL_SECONDS:
+            return cached[1]
+        
+        worksheet = self._spreadsheet(sheet_id).worksheet(worksheet_name)
+        self._worksheet_cache[key] = (time.monotonic(), worksheet)
+        return worksheet
+    
+    def _forget_sheet(self, sheet_id: str) -> None:
+        """Drop cached handles after an error (tabs may have been renamed or removed)"""
+        self._spreadsheet_cache.pop(sheet_id, None)
+        for key in [key for key in self._worksheet_cache if key[0] == sheet_id]:
+            del self._worksheet_cache[key]
+        for key in [key for key in self._url_row_cache if key[0] == sheet_id]:
+            del self._url_row_cache[key]
+    
     def get_or_create_worksheet(
         self,
         sheet_id: str,
@@ -43,15 +125,13 @@ class GoogleSheetsService:
     ) -> gspread.Worksheet:
         """Get existing worksheet or create new one with headers"""
         try:
-            spreadsheet = self.client.open_by_key(sheet_id)
-            
             # Try to get existing worksheet
             try:
-                worksheet = spreadsheet.worksheet(worksheet_name)
+                worksheet = self._ws(sheet_id, worksheet_name)
                 logger.info(f"Found existing worksheet: {worksheet_name}")
             except gspread.WorksheetNotFound:
                 # Create new worksheet
-                worksheet = spreadsheet.add_worksheet(
+                worksheet = self._spreadsheet(sheet_id).add_worksheet(
                     title=worksheet_name,
                     rows=1000,
                     cols=len(headers)
@@ -61,11 +141,13 @@ class GoogleSheetsService:
                 # Format headers (bold)
                 worksheet.format('A1:Z1', {'textFormat': {'bold': True}})
                 logger.info(f"Created new worksheet: {worksheet_name}")
+                self._worksheet_cache[(sheet_id, worksheet_name)] = (time.monotonic(), worksheet)
             
             return worksheet
             
         except Exception as e:
             logger.error(f"Failed to get/create worksheet: {str(e)}")
+            self._forget_sheet(sheet_id)
             raise
     
     def setup_sheet_for_user(self, sheet_id: str) -> Dict[str, bool]:
@@ -91,7 +173,7 @@ class GoogleSheetsService:
         
         try:
             # Create TikTok worksheet
-            self.get_or_create_worksheet(sheet_id, "TikTok", headers)
+            self.get_or_create_worksheet(sheet_id, _PLATFORM_WS[PlatformEnum.TIKTOK], headers)
             results["tiktok"] = True
         except Exception as e:
             logger.error(f"Failed to create TikTok worksheet: {str(e)}")
@@ -99,7 +181,7 @@ class GoogleSheetsService:
         
         try:
             # Create Instagram worksheet
-            self.get_or_create_worksheet(sheet_id, "Instagram", headers)
+            self.get_or_create_worksheet(sheet_id, _PLATFORM_WS[PlatformEnum.INSTAGRAM], headers)
             results["instagram"] = True
         except Exception as e:
             logger.error(f"Failed to create Instagram worksheet: {str(e)}")
@@ -116,10 +198,9 @@ class GoogleSheetsService:
         """Add a single video entry to the appropriate worksheet"""
         try:
             # Determine worksheet based on platform
-            worksheet_name = video.platform.value.capitalize()
+            worksheet_name = _PLATFORM_WS[video.platform]
             
-            spreadsheet = self.client.open_by_key(sheet_id)
-            worksheet = spreadsheet.worksheet(worksheet_name)
+            worksheet = self._ws(sheet_id, worksheet_name)
             
             # Prepare row data
             row = [
@@ -143,8 +224,123 @@ class GoogleSheetsService:
             
         except Exception as e:
             logger.error(f"Failed to add video to sheet: {str(e)}")
+            self._forget_sheet(sheet_id)
             return False
     
+    def _url_rows(
+        self,
+        worksheet: gspread.Worksheet,
+        sheet_id: str,
+        refresh: bool = False
+    ) -> Tuple[Dict[str, int], bool]:
+        """
+        Map video URL -> row for a worksheet from column C
+        
+        Reuses a recent index unless refresh is set; also returns whether
+        the index was just read (and so needs no checking).
+        """
+        key = (sheet_id, worksheet.title)
+        cached = self._url_row_cache.get(key)
+        if not refresh and cached and time.monotonic() - cached[0] < URL_INDEX_TTL_SECONDS:
+            return cached[1], False
+        
+        urls = worksheet.col_values(VIDEO_URL_COLUMN)
+        index = {url: row_num for row_num, url in enumerate(urls, start=1) if url}
+        self._url_row_cache[key] = (time.monotonic(), index)
+        return index, True
+    
+    def _find_video_row(
+        self,
+        worksheet: gspread.Worksheet,
+        sheet_id: str,
+        video_url: str
+    ) -> Optional[int]:
+        """Row number holding video_url, or None"""
+        index, fresh = self._url_rows(worksheet, sheet_id)
+        row_num = index.get(video_url)
+        if fresh:
+            return row_num
+        
+        # A cached row may have moved (sorted/deleted) or the URL been appended
+        # since we indexed (e.g. by the API process); confirm before writing
+        if row_num is not None and worksheet.cell(row_num, VIDEO_URL_COLUMN).value == video_url:
+            return row_num
+        index, _ = self._url_rows(worksheet, sheet_id, refresh=True)
+        return index.get(video_url)
+    
+    def _index_appended_rows(
+        self,
+        sheet_id: str,
+        worksheet_name: str,
+        response: Dict,
+        rows: List[List]
+    ) -> None:
+        """Add freshly appended rows to an already built URL index"""
+        cached = self._url_row_cache.get((sheet_id, worksheet_name))
+        if cached is None:
+            return
+        index = cached[1]
+        
+        match = _UPDATED_RANGE_START_RE.search(
+            response.get("updates", {}).get("updatedRange", "")
+        )
+        if not match:
+            # Can't tell where the rows landed; rebuild on next lookup
+            del self._url_row_cache[(sheet_id, worksheet_name)]
+            return
+        
+        start = int(match.group(1))
+        for offset, row in enumerate(rows):
+            index[row[VIDEO_URL_COLUMN - 1]] = start + offset
+    
+    def _append_rows(
+        self,
+        worksheet: gspread.Worksheet,
+        sheet_id: str,
+        rows: List[List]
+    ) -> int:
+        """
+        Append rows in chunks, retrying each chunk while rate limited
+        
+        Stops at the first chunk that fails; returns how many rows were written.
+        """
+        written = 0
+        
+        for start in range(0, len(rows), APPEND_CHUNK_ROWS):
+            chunk = rows[start:start + APPEND_CHUNK_ROWS]
+            
+            try:
+                for attempt in range(APPEND_MAX_ATTEMPTS):
+                    try:
+                        response = worksheet.append_rows(
+                            chunk,
+                            value_input_option='USER_ENTERED',
+                            insert_data_option='INSERT_ROWS',
+                            table_range='A1'  # Always the table starting at A1, below the header
+                        )
+                        break
+                    except gspread.exceptions.APIError as e:
+                        if (
+                            e.response.status_code != RATE_LIMITED_STATUS_CODE
+                            or attempt == APPEND_MAX_ATTEMPTS - 1
+                        ):
+                            raise
+                        delay = min(2 ** attempt, APPEND_MAX_BACKOFF_SECONDS)
+                        logger.warning(f"Sheets append rate limited, retrying in {delay}s")
+                        time.sleep(delay)
+            
+            except Exception as e:
+                logger.error(
+                    f"Failed to append to {worksheet.title} after {written} of {len(rows)} rows: {str(e)}"
+                )
+                self._forget_sheet(sheet_id)
+                return written
+            
+            self._index_appended_rows(sheet_id, worksheet.title, response, chunk)
+            written += len(chunk)
+        
+        return written
+    
     def update_transcription_in_sheet(
         self,
         sheet_id: str,
@@ -155,17 +351,14 @@ class GoogleSheetsService:
     ) -> bool:
         """Update transcription for an existing video entry"""
         try:
-            worksheet_name = platform.value.capitalize()
-            spreadsheet = self.client.open_by_key(sheet_id)
-            worksheet = spreadsheet.worksheet(worksheet_name)
+            worksheet_name = _PLATFORM_WS[platform]
+            worksheet = self._ws(sheet_id, worksheet_name)
             
             # Find the row with this video URL (column C)
-            cell = worksheet.find(video_url)
-            if cell:
-                row_num = cell.row
-                # Update transcription (column J) and status (column K)
-                worksheet.update(f'J{row_num}', [[transcription]])
-                worksheet.update(f'K{row_num}', [[status]])
+            row_num = self._find_video_row(worksheet, sheet_id, video_url)
+            if row_num:
+                # Update transcription (column J) and status (column K) in one write
+                worksheet.update(f'J{row_num}:K{row_num}', [[transcription, status]])
                 logger.info(f"Updated transcription in sheet for: {video_url}")
                 return True
             else:
@@ -174,8 +367,76 @@ class GoogleSheetsService:
                 
         except Exception as e:
             logger.error(f"Failed to update transcription in sheet: {str(e)}")
+            self._forget_sheet(sheet_id)
             return False
     
+    def update_transcriptions_batch(
+        self,
+        sheet_id: str,
+        updates: List[Dict]
+    ) -> int:
+        """
+        Update many transcriptions with a single values.batchUpdate call
+        
+        Each update has video_url, platform, transcription and status keys.
+        Returns how many rows were found and written.
+        """
+        try:
+            data = []
+            
+            # Re-read column C once per worksheet rather than checking each
+            # cached row, so rows moved in the sheet are never overwritten
+            indexes = {}
+            for worksheet_name in {_PLATFORM_WS[update["platform"]] for update in updates}:
+                indexes[worksheet_name], _ = self._url_rows(
+                    self._ws(sheet_id, worksheet_name), sheet_id, refresh=True
+                )
+            
+            for update in updates:
+                worksheet_name = _PLATFORM_WS[update["platform"]]
+                row_num = indexes[worksheet_name].get(update["video_url"])
+                if not row_num:
+                    logger.warning(f"Video URL not found in sheet: {update['video_url']}")
+                    continue
+                
+                data.append({
+                    "range": f"'{worksheet_name}'!J{row_num}:K{row_num}",
+                    "values": [[update["transcription"], update.get("status", "completed")]]
+                })
+            
+            if data:
+                self._spreadsheet(sheet_id).values_batch_update(
+                    {"valueInputOption": "RAW", "data": data}
+                )
+                logger.info(f"Updated {len(data)} transcriptions in sheet")
+            
+            return len(data)
+            
+        except Exception as e:
+            logger.error(f"Failed to batch update transcriptions in sheet: {str(e)}")
+            self._forget_sheet(sheet_id)
+            return 0
+    
+    def _build_batch_row(self, video: Dict, keyword: str, scraped_at: str) -> List:
+        """Build a sheet row for a freshly scraped video dict"""
+        video_url, author_username, description, likes, comments, shares, views = (
+            _batch_row_fields(video)
+        )
+        
+        return [
+            scraped_at,
+            keyword,
+            video_url,
+            author_username,
+            _trim_description(description or ""),
+            likes,
+            comments,
+            shares,
+            views,
+            "",  # Transcription (empty initially)
+            "pending"  # Transcription status
+        ]
+    
     def add_videos_batch(
         self,
         sheet_id: str,
@@ -185,49 +446,65 @@ class GoogleSheetsService:
     ) -> int:
         """Add multiple videos to sheet in batch"""
         try:
-            worksheet_name = platform.value.capitalize()
-            spreadsheet = self.client.open_by_key(sheet_id)
-            worksheet = spreadsheet.worksheet(worksheet_name)
+            worksheet_name = _PLATFORM_WS[platform]
+            worksheet = self._ws(sheet_id, worksheet_name)
             
             # Prepare all rows
-            rows = []
-            now = datetime.utcnow().strftime("%Y-%m-%d %H:%M")
-            
-            for video in videos:
-                description = video.get("description", "") or ""
-                if len(description) > 200:
-                    description = description[:200] + "..."
-                
-                row = [
-                    now,
-                    keyword,
-                    video.get("video_url", ""),
-                    video.get("author_username", ""),
-                    description,
-                    video.get("likes", 0),
-                    video.get("comments", 0),
-                    video.get("shares", 0),
-                    video.get("views", 0),
-                    "",  # Transcription (empty initially)
-                    "pending"  # Transcription status
-                ]
-                rows.append(row)
+            now = datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M")
+            rows = [self._build_batch_row(video, keyword, now) for video in videos]
             
             # Batch append
-            if rows:
-                worksheet.append_rows(rows, value_input_option='USER_ENTERED')
-                logger.info(f"Added {len(rows)} videos to {worksheet_name} sheet")
+            if not rows:
+                return 0
+            written = self._append_rows(worksheet, sheet_id, rows)
+            logger.info(f"Added {written} videos to {worksheet_name} sheet")
+            return written
+            
+        except Exception as e:
+            logger.error(f"Failed to batch add videos: {str(e)}")
+            self._forget_sheet(sheet_id)
+            return 0
+    
+    def add_videos_batch_multi(
+        self,
+        sheet_id: str,
+        batches: Dict[Tuple[PlatformEnum, str], List[Dict]]
+    ) -> int:
+        """
+        Add videos for many (platform, keyword) pairs in one flush
+        
+        Issues a single append per worksheet
+        """
+        try:
+            now = datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M")
+            
+            rows_by_worksheet = defaultdict(list)
+            for (platform, keyword), videos in batches.items():
+                rows_by_worksheet[_PLATFORM_WS[platform]].extend(
+                    self._build_batch_row(video, keyword, now) for video in videos
+                )
+            
+            total = 0
+            for worksheet_name, rows in rows_by_worksheet.items():
+                if not rows:
+                    continue
+                written = self._append_rows(self._ws(sheet_id, worksheet_name), sheet_id, rows)
+                logger.info(f"Added {written} videos to {worksheet_name} sheet")
+                total += written
             
-            return len(rows)
+            return total
             
         except Exception as e:
             logger.error(f"Failed to batch add videos: {str(e)}")
+            self._forget_sheet(sheet_id)
             return 0
     
     def verify_sheet_access(self, sheet_id: str) -> Dict:
         """Verify we can access the sheet and return info"""
         try:
+            # Always open fresh here; the handle then serves follow-up calls
             spreadsheet = self.client.open_by_key(sheet_id)
+            self._spreadsheet_cache[sheet_id] = (time.monotonic(), spreadsheet)
             return {
                 "success": True,
                 "title": spreadsheet.title,
@@ -1,28 +1,68 @@
 import os
 import tempfile
+import threading
 import logging
-from typing import Optional
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterator, List, Optional, Tuple, Union
 from faster_whisper import WhisperModel
+from faster_whisper.audio import decode_audio
+from faster_whisper.vad import VadOptions, collect_chunks, get_speech_timestamps
+import ctranslate2
 import yt_dlp
+from app.config import settings
 
 logger = logging.getLogger(__name__)
 
+# Downloads running ahead of the transcriber in transcribe_videos_batch
+DOWNLOAD_WORKERS = 4
+
+# Whisper's input rate; VAD timestamps are in samples at this rate
+SAMPLE_RATE = 16000
+
+# Clips with less detected speech than this (music-only reels) skip Whisper
+MIN_SPEECH_SECONDS = 1.0
+
 # Global model instance (loaded once)
 _whisper_model: Optional[WhisperModel] = None
 
 
 def get_whisper_model() -> WhisperModel:
-    """Get or initialize Whisper model (singleton pattern)"""
+    """
+    Get or initialize Whisper model (singleton pattern)
+    
+    Loaded on first use, not at import, so processes that never transcribe
+    (the API) don't pay for it. Celery workers load it right after fork.
+    """
     global _whisper_model
     if _whisper_model is None:
-        logger.info("Loading Faster-Whisper model...")
-        # Use "base" for speed, "medium" or "large-v2" for accuracy
-        # compute_type options: "int8" (fastest), "float16" (GPU), "float32" (CPU accurate)
-        _whisper_model = WhisperModel(
-            "base",
-            device="cpu",  # Change to "cuda" if you have GPU
-            compute_type="int8"
-        )
+        device = settings.whisper_device
+        if device == "auto":
+            device = "cuda" if ctranslate2.get_cuda_device_count() > 0 else "cpu"
+        
+        logger.info(f"Loading Faster-Whisper model ({settings.whisper_model_size} on {device})...")
+        model_kwargs = {
+            "device": device,
+            # int8 weights everywhere; on GPU the activations run in float16
+            "compute_type": "int8_float16" if device == "cuda" else "int8",
+            "cpu_threads": settings.whisper_cpu_threads or os.cpu_count() or 0,
+            # With a pre-downloaded shared dir, every worker maps the same
+            # weight files and the OS page cache shares them
+            "download_root": settings.whisper_download_root,
+        }
+        
+        if settings.whisper_download_root is not None:
+            try:
+                # Skip the Hub lookup when the model is already in the dir
+                _whisper_model = WhisperModel(
+                    settings.whisper_model_size, local_files_only=True, **model_kwargs
+                )
+            except Exception:
+                logger.info(
+                    f"Whisper model not found in {settings.whisper_download_root}, downloading"
+                )
+        
+        if _whisper_model is None:
+            _whisper_model = WhisperModel(settings.whisper_model_size, **model_kwargs)
         logger.info("Whisper model loaded successfully")
     return _whisper_model
 
@@ -31,20 +71,28 @@ class TranscriptionService:
     """Service for downloading and transcribing social media videos"""
     
     def __init__(self):
-        self.model = get_whisper_model()
-        
-        # yt-dlp options for downloading audio
+        # yt-dlp options for downloading audio. The source stream is kept
+        # as-is: faster-whisper decodes and resamples to 16 kHz mono itself,
+        # so an mp3 re-encode would be wasted work
         self.ydl_opts = {
-            'format': 'bestaudio/best',
-            'postprocessors': [{
-                'key': 'FFmpegExtractAudio',
-                'preferredcodec': 'mp3',
-                'preferredquality': '192',
-            }],
+            'format': 'bestaudio[ext=m4a]/bestaudio/best',  # TikTok often has no audio-only stream
             'quiet': True,
             'no_warnings': True,
             'extract_flat': False,
+            'writeinfojson': False,  # Only the audio file lands in the temp dir
+            'writethumbnail': False,
         }
+        # YoutubeDL isn't thread-safe, and batch downloads run on a pool, so
+        # each thread keeps its own instance (and its HTTP connection pool)
+        self._local = threading.local()
+    
+    def _ydl(self) -> yt_dlp.YoutubeDL:
+        """This thread's YoutubeDL, created on first use"""
+        ydl = getattr(self._local, "ydl", None)
+        if ydl is None:
+            ydl = yt_dlp.YoutubeDL(self.ydl_opts)
+            self._local.ydl = ydl
+        return ydl
     
     def download_audio(self, video_url: str, output_path: str) -> str:
         """
@@ -53,27 +101,14 @@ class TranscriptionService:
         Returns path to downloaded audio file
         """
         try:
-            ydl_opts = {
-                **self.ydl_opts,
-                'outtmpl': output_path,
-            }
-            
-            with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-                logger.info(f"Downloading audio from: {video_url}")
-                ydl.download([video_url])
+            ydl = self._ydl()
+            ydl.params['outtmpl']['default'] = output_path + '.%(ext)s'
             
-            # yt-dlp adds extension
-            audio_path = output_path + ".mp3"
-            if os.path.exists(audio_path):
-                return audio_path
+            logger.info(f"Downloading audio from: {video_url}")
+            info = ydl.extract_info(video_url, download=True)
             
-            # Sometimes it keeps original format
-            for ext in ['.mp3', '.m4a', '.webm', '.mp4']:
-                potential_path = output_path + ext
-                if os.path.exists(potential_path):
-                    return potential_path
-            
-            raise FileNotFoundError(f"Downloaded audio file not found at {output_path}")
+            # yt-dlp reports where it wrote the file (extension depends on the stream)
+            return info['requested_downloads'][0]['filepath']
             
         except Exception as e:
             logger.error(f"Failed to download audio from {video_url}: {str(e)}")
@@ -83,16 +118,29 @@ class TranscriptionService:
         """
         Transcribe audio file using Faster-Whisper
         
-        Returns transcription text
+        Returns transcription text, or "" when the clip has no speech
         """
         try:
             logger.info(f"Transcribing audio: {audio_path}")
             
-            segments, info = self.model.transcribe(
-                audio_path,
-                beam_size=5,
+            # Decode and run VAD once here rather than inside transcribe(),
+            # so silent clips never reach the model
+            audio = decode_audio(audio_path, sampling_rate=SAMPLE_RATE)
+            speech = get_speech_timestamps(audio, VadOptions())
+            speech_samples = sum(chunk["end"] - chunk["start"] for chunk in speech)
+            if speech_samples < MIN_SPEECH_SECONDS * SAMPLE_RATE:
+                logger.info(f"No speech detected in {audio_path}, skipping Whisper")
+                return ""
+            
+            # Greedy decoding: short social clips gain little from beam search
+            segments, info = get_whisper_model().transcribe(
+                collect_chunks(audio, speech),  # Speech only, already 16 kHz mono
+                beam_size=1,
+                best_of=1,
+                temperature=0.0,
+                condition_on_previous_text=False,  # Avoids repetition loops on short clips
                 language=None,  # Auto-detect language
-                vad_filter=True,  # Filter out silence
+                vad_filter=False,  # Silence already cut above
             )
             
             # Combine all segments into full transcription
@@ -105,53 +153,53 @@ class TranscriptionService:
             logger.error(f"Failed to transcribe {audio_path}: {str(e)}")
             raise
     
-    async def transcribe_video(self, video_url: str) -> str:
+    def transcribe_video_sync(self, video_url: str) -> str:
         """
-        Full pipeline: download video audio and transcribe
+        Full pipeline for Celery workers: download video audio and transcribe
         
         Returns transcription text
         """
-        temp_dir = tempfile.mkdtemp()
-        audio_path = None
-        
-        try:
-            # Download audio
+        # Removed with everything in it on exit
+        with tempfile.TemporaryDirectory() as temp_dir:
             output_path = os.path.join(temp_dir, "audio")
             audio_path = self.download_audio(video_url, output_path)
-            
-            # Transcribe
-            transcription = self.transcribe_audio(audio_path)
-            
-            return transcription
-            
-        finally:
-            # Cleanup temp files
-            if audio_path and os.path.exists(audio_path):
-                os.remove(audio_path)
-            if os.path.exists(temp_dir):
-                os.rmdir(temp_dir)
+            return self.transcribe_audio(audio_path)
     
-    def transcribe_video_sync(self, video_url: str) -> str:
+    def transcribe_videos_batch(
+        self,
+        video_urls: List[str]
+    ) -> Iterator[Tuple[str, Union[str, Exception]]]:
         """
-        Synchronous version for use in Celery workers
-        """
-        temp_dir = tempfile.mkdtemp()
-        audio_path = None
+        Transcribe many videos, downloading ahead while Whisper runs
         
-        try:
-            output_path = os.path.join(temp_dir, "audio")
-            audio_path = self.download_audio(video_url, output_path)
-            transcription = self.transcribe_audio(audio_path)
-            return transcription
-            
-        finally:
-            if audio_path and os.path.exists(audio_path):
-                os.remove(audio_path)
-            try:
-                if os.path.exists(temp_dir):
-                    os.rmdir(temp_dir)
-            except OSError:
-                pass  # Directory not empty, ignore
+        Downloads run on a thread pool (network-bound); transcription stays
+        on this thread since Whisper is already multi-threaded. Yields
+        (video_url, transcription) in input order, with the exception in
+        place of the transcription when a video fails.
+        """
+        with tempfile.TemporaryDirectory() as temp_dir:
+            with ThreadPoolExecutor(max_workers=DOWNLOAD_WORKERS) as pool:
+                downloads = [
+                    (url, pool.submit(self.download_audio, url, os.path.join(temp_dir, f"audio_{i}")))
+                    for i, url in enumerate(video_urls)
+                ]
+                
+                for url, download in downloads:
+                    try:
+                        audio_path = download.result()
+                    except Exception as e:
+                        yield url, e
+                        continue
+                    
+                    try:
+                        transcription = self.transcribe_audio(audio_path)
+                    except Exception as e:
+                        yield url, e
+                        continue
+                    finally:
+                        os.remove(audio_path)
+                    
+                    yield url, transcription
 
 
 # Singleton instance
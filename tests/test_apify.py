@@ -0,0 +1,34 @@
+from app.services.apify import _search_queries, _split_by_query
+
+
+def test_keywords_differing_in_case_share_one_query():
+    """Keywords like "AI" and "ai" are separate rows but one search"""
+    assert list(_search_queries(["AI", "ai", " Cooking  tips", "cooking tips"]).values()) == [
+        "AI", " Cooking  tips"
+    ]
+
+
+def test_split_matches_normalized_queries_and_fans_out():
+    """Re-cased/re-spaced searchQuery values still match, and colliding keywords all get them"""
+    items = [
+        {"id": "1", "searchQuery": "ai"},
+        {"id": "2", "searchQuery": "  AI "},
+        {"id": "3", "searchQuery": "Cooking Tips"},
+        {"id": "4", "searchQuery": "something else"},
+    ]
+
+    by_keyword, unmatched = _split_by_query(["AI", "ai", "cooking  tips"], items)
+
+    assert [item["id"] for item in by_keyword["AI"]] == ["1", "2"]
+    assert [item["id"] for item in by_keyword["ai"]] == ["1", "2"]
+    assert [item["id"] for item in by_keyword["cooking  tips"]] == ["3"]
+    assert unmatched == 1
+
+
+def test_split_single_query_keeps_items_without_search_query():
+    """With one query every item belongs to it, even without searchQuery"""
+    by_keyword, unmatched = _split_by_query(["AI", "ai"], [{"id": "1"}, {"id": "2", "searchQuery": "x"}])
+
+    assert [item["id"] for item in by_keyword["AI"]] == ["1", "2"]
+    assert by_keyword["ai"] is by_keyword["AI"]
+    assert unmatched == 0
@@ -0,0 +1,15 @@
+from app.models import PlatformEnum
+from app.services.sheets import GoogleSheetsService, _PLATFORM_WS
+
+
+def test_platform_worksheets_match_setup_tabs():
+    """Every platform's worksheet name is a tab setup_sheet_for_user creates"""
+    service = GoogleSheetsService.__new__(GoogleSheetsService)  # No Google client
+    created = []
+    service.get_or_create_worksheet = lambda sheet_id, name, headers: created.append(name)
+
+    service.setup_sheet_for_user("sheet-id")
+
+    assert set(_PLATFORM_WS.values()) == set(created)
+    assert _PLATFORM_WS[PlatformEnum.TIKTOK] == "TikTok"
+    assert _PLATFORM_WS[PlatformEnum.INSTAGRAM] == "Instagram"